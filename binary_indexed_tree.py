@@ -1,4 +1,6 @@
-from collections import deque
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
 from typing import (Callable, Generic, Iterable, MutableSequence, NamedTuple,
                     TypeVar)
 
@@ -8,6 +10,20 @@ class BinaryIndexedTree:
         self.length = length + 1
         self.data = [0] * self.length
 
+    @classmethod
+    def from_seq(cls, seq: Iterable[int]) -> 'BinaryIndexedTree':
+        """seq[i - 1] を index i に置いた木を O(n) で作る"""
+        obj = cls(0)
+        data = obj.data
+        data.extend(seq)
+        length = len(data)
+        obj.length = length
+        for i in range(1, length):
+            j = i + (i & -i)
+            if j < length:
+                data[j] += data[i]
+        return obj
+
     def add(self, index, v):
         # index += 1
         length = self.length
@@ -30,16 +46,320 @@ class BinaryIndexedTree:
             index -= (index & -index)
         return v
 
+    def add_many(self, indices, values):
+        """add をまとめて行う。
+        件数が多いときは差分を一度貯めてから親へ一括で流すので O(n + k) になる。"""
+        indices = list(indices)
+        values = list(values)
+        length = self.length
+        data = self.data
+        if len(indices) * (length.bit_length()) < length:
+            add = self.add
+            for index, v in zip(indices, values):
+                add(index, v)
+            return
+        delta = [0] * length
+        for index, v in zip(indices, values):
+            if 0 < index < length:
+                delta[index] += v
+        for i in range(1, length):
+            d = delta[i]
+            if d:
+                data[i] += d
+                j = i + (i & -i)
+                if j < length:
+                    delta[j] += d
+
+    def query_many(self, indices):
+        """query をまとめて行う。
+        件数が多いときは全ての累積和を O(n) で復元してから引く。"""
+        indices = list(indices)
+        length = self.length
+        if len(indices) * (length.bit_length()) < length:
+            return [self.query(index) for index in indices]
+        prefix = self.data[:]
+        for i in range(length - 1, 0, -1):
+            j = i + (i & -i)
+            if j < length:
+                prefix[j] -= prefix[i]
+        prefix = list(accumulate(prefix))
+        last = length - 1
+        return [prefix[min(index, last)] if index > 0 else 0 for index in indices]
+
+    def lower_bound(self, value):
+        """query(i) >= value となる最小の i 。無ければ self.length を返す。
+        要素が非負であることが前提。"""
+        if value <= 0:
+            return 0
+        data = self.data
+        length = self.length
+        index = 0
+        step = 1 << ((length - 1).bit_length() - 1) if length > 1 else 0
+        while step:
+            i = index + step
+            if i < length and data[i] < value:
+                index = i
+                value -= data[i]
+            step >>= 1
+        return index + 1
+
+    def kth(self, k):
+        """頻度表とみなして 0-indexed で k 番目の要素がある index"""
+        return self.lower_bound(k + 1)
+
+
+class SparseBinaryIndexedTree:
+    """触った節点だけを dict に持つ BIT 。
+    2 ** 40 のような広い添字空間でも使え、領域は O(更新回数 * log U) 。"""
+
+    def __init__(self, length):
+        self.length = length + 1
+        self.data = {}
+
+    def add(self, index, v):
+        length = self.length
+        data = self.data
+        get = data.get
+        while index < length:
+            data[index] = get(index, 0) + v
+            index += (index & -index)
+
+    def query(self, index):
+        get = self.data.get
+        v = 0
+        while index > 0:
+            v += get(index, 0)
+            index -= (index & -index)
+        return v
+
+    def lower_bound(self, value):
+        """BinaryIndexedTree.lower_bound と同じ"""
+        if value <= 0:
+            return 0
+        get = self.data.get
+        length = self.length
+        index = 0
+        step = 1 << ((length - 1).bit_length() - 1) if length > 1 else 0
+        while step:
+            i = index + step
+            if i < length:
+                d = get(i, 0)
+                if d < value:
+                    index = i
+                    value -= d
+            step >>= 1
+        return index + 1
+
+    def kth(self, k):
+        return self.lower_bound(k + 1)
+
+
+class BinaryIndexedTreeMultiset:
+    """0 以上 size 未満の int を要素とする順序付き多重集合"""
+
+    def __init__(self, size):
+        self.size = size
+        self.counts = [0] * size
+        self.tree = BinaryIndexedTree(size)
+        self._len = 0
+
+    def add(self, x, count=1):
+        if not (0 <= x < self.size):
+            raise ValueError(x)
+        self.counts[x] += count
+        self.tree.add(x + 1, count)
+        self._len += count
+
+    def remove(self, x, count=1):
+        if not (0 <= x < self.size) or self.counts[x] < count:
+            raise KeyError(x)
+        self.counts[x] -= count
+        self.tree.add(x + 1, -count)
+        self._len -= count
+
+    def count(self, x):
+        if not (0 <= x < self.size):
+            return 0
+        return self.counts[x]
+
+    def count_less(self, x):
+        return self.tree.query(min(max(x, 0), self.size))
+
+    def kth(self, k):
+        if k < 0:
+            k += self._len
+        if not (0 <= k < self._len):
+            raise IndexError(k)
+        return self.tree.kth(k) - 1
+
+    def __contains__(self, x):
+        return self.count(x) > 0
+
+    def __len__(self):
+        return self._len
+
+
+class RangeAddBinaryIndexedTree:
+    """区間加算・区間和の BIT
+
+    添字は LazySegumentTree と同じく 0 始まりの半開区間 [start, end) 。
+    2 本の BIT で prefix(i) = b1.query(i) * i - b2.query(i) を保つ。
+    点加算は b2 と values (生の値の写し) だけを触るので、 range_add を一度も
+    呼んでいなければ get は values を読むだけの O(1) で済む。"""
+
+    def __init__(self, length):
+        self.values = [0] * length
+        self.b1 = BinaryIndexedTree(length)
+        self.b2 = BinaryIndexedTree(length)
+        self._range_added = False
+
+    @classmethod
+    def from_seq(cls, seq):
+        obj = cls(0)
+        obj.values = list(seq)
+        obj.b1 = BinaryIndexedTree(len(obj.values))
+        obj.b2 = BinaryIndexedTree.from_seq(-v for v in obj.values)
+        return obj
+
+    def _prefix(self, index):
+        return self.b1.query(index) * index - self.b2.query(index)
+
+    def add(self, index, v):
+        self.values[index] += v
+        self.b2.add(index + 1, -v)
+
+    def update(self, index, v):
+        self.add(index, v - self.get(index))
+
+    def range_add(self, start, end, v):
+        if start >= end:
+            return
+        self._range_added = True
+        b1 = self.b1
+        b2 = self.b2
+        b1.add(start + 1, v)
+        b1.add(end + 1, -v)
+        b2.add(start + 1, v * start)
+        b2.add(end + 1, -v * end)
+
+    def range_sum(self, start, end):
+        return self._prefix(end) - self._prefix(start)
+
+    def get(self, index):
+        v = self.values[index]
+        if self._range_added:
+            v += self.b1.query(index + 1)
+        return v
+
+    def __len__(self):
+        return len(self.values)
+
+
+class BinaryIndexedTree2D:
+    """2 次元 BIT 。 height * width の格子を一本の array に詰める。
+    添字は BinaryIndexedTree と同じく 1 始まり。"""
+
+    def __init__(self, height, width, typecode='q'):
+        self.height = height + 1
+        self.width = width + 1
+        self.data = array(typecode, bytes(array(typecode).itemsize * self.height * self.width))
+
+    def add(self, x, y, v):
+        height = self.height
+        width = self.width
+        data = self.data
+        while x < height:
+            base = x * width
+            j = y
+            while j < width:
+                data[base + j] += v
+                j += (j & -j)
+            x += (x & -x)
+
+    def query(self, x, y):
+        """1 <= i <= x, 1 <= j <= y の和"""
+        width = self.width
+        data = self.data
+        v = 0
+        while x > 0:
+            base = x * width
+            j = y
+            while j > 0:
+                v += data[base + j]
+                j -= (j & -j)
+            x -= (x & -x)
+        return v
+
+    def range_sum(self, x1, y1, x2, y2):
+        """x1 < i <= x2, y1 < j <= y2 の和"""
+        query = self.query
+        return query(x2, y2) - query(x1, y2) - query(x2, y1) + query(x1, y1)
+
+
+class CompressedBinaryIndexedTree2D:
+    """座標圧縮した疎な 2 次元 BIT
+
+    add する点を先に全部渡しておく (オフライン) 。 x 方向の BIT の各節点は、
+    その節点が受け持つ行に現れる y だけを持つ BIT にする。
+    領域は O(k log k) 、 add と query は O(log^2 k) 。 (k は点の数)
+    座標は 0 始まりの半開区間で扱う。"""
+
+    def __init__(self, points):
+        points = sorted(set(points))
+        self.xs = xs = sorted(set(x for x, _ in points))
+        length = len(xs) + 1
+        ys = [set() for _ in range(length)]
+        for x, y in points:
+            i = bisect_left(xs, x) + 1
+            while i < length:
+                ys[i].add(y)
+                i += (i & -i)
+        self.ys = [sorted(y) for y in ys]
+        self.data = [[0] * (len(y) + 1) for y in self.ys]
+
+    def add(self, x, y, v):
+        xs = self.xs
+        i = bisect_left(xs, x)
+        if i == len(xs) or xs[i] != x:
+            raise KeyError((x, y))
+        i += 1
+        length = len(xs) + 1
+        while i < length:
+            ys = self.ys[i]
+            j = bisect_left(ys, y)
+            if j == len(ys) or ys[j] != y:
+                raise KeyError((x, y))
+            j += 1
+            data = self.data[i]
+            while j < len(data):
+                data[j] += v
+                j += (j & -j)
+            i += (i & -i)
+
+    def query(self, x, y):
+        """x 座標が x 未満、 y 座標が y 未満の点の和"""
+        i = bisect_left(self.xs, x)
+        v = 0
+        while i > 0:
+            j = bisect_left(self.ys[i], y)
+            data = self.data[i]
+            while j > 0:
+                v += data[j]
+                j -= (j & -j)
+            i -= (i & -i)
+        return v
+
+    def range_sum(self, x1, y1, x2, y2):
+        """[x1, x2) * [y1, y2) の和"""
+        query = self.query
+        return query(x2, y2) - query(x1, y2) - query(x2, y1) + query(x1, y1)
+
 
 X = TypeVar('X')
 FX = Callable[[X, X], X]
 EX = Callable[[], X]
 
 
-def _consume(iterator):
-    deque(iterator, maxlen=0)
-
-
 class Monoid(NamedTuple):
     fx: FX
     ex: EX
@@ -58,18 +378,18 @@ class BinaryIndexedTreeG(Generic[X]):
         self.monoid = monoid
 
     @classmethod
-    def from_seq(cls, seq: Iterable[X], monoid: Monoid) -> None:
-        try:
-            length = len(seq)
-        except:
-            data = tuple(seq)
-            length = len(data)
-        else:
-            data = seq
-        obj = cls(length, monoid)
-        update = obj.update
-        # _consume(update(i, v) for i, v in enumerate(data))
-        _consume(update(i, v) for i, v in enumerate(data, 1))
+    def from_seq(cls, seq: Iterable[X], monoid: Monoid) -> 'BinaryIndexedTreeG[X]':
+        """seq[i - 1] を index i に置いた木を O(n) で作る"""
+        obj = cls(0, monoid)
+        data = obj.data
+        data.extend(seq)
+        length = len(data)
+        obj.length = length
+        fx = monoid.fx
+        for i in range(1, length):
+            j = i + (i & -i)
+            if j < length:
+                data[j] = fx(data[j], data[i])
         return obj
 
     def update(self, index: int, v: X) -> None:
@@ -112,5 +432,59 @@ def main() -> None:
     print(A == B)
 
 
+def bench(length: int = 10 ** 5, queries: int = 10 ** 4) -> None:
+    import operator
+    from random import Random
+    from time import perf_counter
+
+    from lazysegtree import LazySegumentTree
+    from lazysegtree import Monoid as LazyMonoid
+
+    mo = LazyMonoid(fx=operator.add,
+                    fa=operator.add,
+                    fm=operator.add,
+                    fp=operator.mul,
+                    ex=int,
+                    em=int,
+                    )
+    r = Random(0)
+    ops = []
+    for _ in range(queries):
+        L, R = sorted((r.randrange(length + 1), r.randrange(length + 1)))
+        ops.append((r.random() < 0.5, L, R, r.randint(-100, 100)))
+
+    t0 = perf_counter()
+    a = RangeAddBinaryIndexedTree(length)
+    A = [a.range_add(L, R, v) if is_add else a.range_sum(L, R) for is_add, L, R, v in ops]
+    t1 = perf_counter()
+    b: LazySegumentTree[int, int] = LazySegumentTree((0,) * length, mo)
+    B = [b.update(L, R, v) if is_add else b.query(L, R) for is_add, L, R, v in ops]
+    t2 = perf_counter()
+    print(f'RangeAddBinaryIndexedTree {t1 - t0:.3f}s LazySegumentTree {t2 - t1:.3f}s {A == B}')
+
+
+def bench_sparse(updates: int = 10 ** 4) -> None:
+    import tracemalloc
+    from random import Random
+    from time import perf_counter
+
+    r = Random(0)
+    for bits in range(10, 25, 2):
+        length = 1 << bits
+        indices = [r.randint(1, length) for _ in range(updates)]
+        for cls in (BinaryIndexedTree, SparseBinaryIndexedTree):
+            tracemalloc.start()
+            t0 = perf_counter()
+            a = cls(length)
+            for i in indices:
+                a.add(i, 1)
+            for i in indices:
+                a.query(i)
+            t1 = perf_counter()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            print(f'{cls.__name__} {length=} time={t1 - t0:.3f}s memory={memory / 2 ** 20:.2f}MiB')
+
+
 if __name__ == '__main__':
     main()
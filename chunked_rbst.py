@@ -0,0 +1,509 @@
+"""値を小さな配列 (チャンク) にまとめて持つ RBST
+
+RBST は要素ごとに Node を作るので、要素数だけオブジェクトができ、どこを触るにもポインタを辿る。
+ここでは各節点が最大 chunk_size * 2 個の値を list で持ち、木の節点数を要素数 / chunk_size 程度に減らす。
+
+ - 節点の lazy は部分木全体 (自分のチャンクを含む) に掛かる遅延評価。
+ - clazy はチャンクの中身にまだ反映していない遅延評価。個々の値を読むときに初めて反映する。
+ - update と get_acc は木の形を変えずに、区間に丸ごと含まれる部分木とチャンクをまとめて扱う。
+ - insert と 1 要素の削除はチャンクの中で行い、大きくなりすぎたチャンクは二つに分ける。
+ - 区間の削除は split / merge で行う。切れ端のチャンクが増えすぎたら作り直す。
+
+Monoid は rbst.Monoid と同じもの。
+"""
+from __future__ import annotations
+
+from functools import reduce
+from random import Random
+from typing import (Generic, Iterable, Iterator, List, Optional, Sequence,
+                    Tuple, TypeVar, overload)
+
+from rbst import Monoid, accumulate_monoid, rmq_monoid
+
+X = TypeVar('X')
+M = TypeVar('M')
+
+__all__ = ['ChunkNode', 'ChunkedRBST', 'Monoid', 'accumulate_monoid', 'rmq_monoid']
+
+
+class ChunkNode(Generic[X, M]):
+    __slots__ = ('values', 'cacc', 'clazy', 'acc', 'lazy', 'left', 'right', 'length')
+
+    values: List[X]
+    cacc: X
+    clazy: M
+    acc: X
+    lazy: M
+    left: Optional[ChunkNode[X, M]]
+    right: Optional[ChunkNode[X, M]]
+    length: int
+
+    def __init__(self, values: List[X], cacc: X, lazy: M) -> None:
+        self.values = values
+        self.cacc = cacc
+        self.clazy = lazy
+        self.acc = cacc
+        self.lazy = lazy
+        self.left = None
+        self.right = None
+        self.length = len(values)
+
+
+class ChunkedRBST(Sequence[X], Iterable[X], Generic[X, M]):
+    random: Random = Random()
+    root: Optional[ChunkNode[X, M]]
+
+    def __init__(self, monoid: Monoid, random_generagor: Optional[Random] = None, values: Iterable[X] = (),
+                 chunk_size: int = 64) -> None:
+        if chunk_size <= 0:
+            raise ValueError(chunk_size)
+        self.monoid = monoid
+        self.chunk_size = chunk_size
+        if random_generagor:
+            self.random = random_generagor
+        self.nodes = 0
+        self.root = self._build(values)
+
+    def _new_node(self, values: List[X]) -> ChunkNode[X, M]:
+        self.nodes += 1
+        return ChunkNode(values, reduce(self.monoid.fx, values), self.monoid.em())
+
+    def _build(self, values: Iterable[X]) -> Optional[ChunkNode[X, M]]:
+        values = list(values)
+        size = self.chunk_size
+        chunks = [values[i:i + size] for i in range(0, len(values), size)]
+
+        def build(start: int, end: int) -> Optional[ChunkNode[X, M]]:
+            if start >= end:
+                return None
+            mid = (start + end) // 2
+            node = self._new_node(chunks[mid])
+            node.left = build(start, mid)
+            node.right = build(mid + 1, end)
+            self._pull(node)
+            return node
+
+        return build(0, len(chunks))
+
+    def _compose(self, lazy: M, pending: M) -> M:
+        # 単位元を fm に渡さない (rmq_monoid の fm は右側をそのまま返すため)
+        if pending == self.monoid.em():
+            return lazy
+        return self.monoid.fm(lazy, pending)
+
+    def _eval(self, node: Optional[ChunkNode[X, M]]) -> None:
+        if node is None:
+            return
+        em = self.monoid.em()
+        lazy = node.lazy
+        if lazy == em:
+            return
+        compose = self._compose
+        if node.left is not None:
+            node.left.lazy = compose(node.left.lazy, lazy)
+        if node.right is not None:
+            node.right.lazy = compose(node.right.lazy, lazy)
+        fa = self.monoid.fa
+        fp = self.monoid.fp
+        node.clazy = compose(node.clazy, lazy)
+        node.cacc = fa(node.cacc, fp(lazy, len(node.values)))
+        node.acc = fa(node.acc, fp(lazy, node.length))
+        node.lazy = em
+
+    def _materialize(self, node: ChunkNode[X, M]) -> List[X]:
+        """チャンクに溜めた遅延評価を値に反映して返す。 node は評価済みであること"""
+        clazy = node.clazy
+        em = self.monoid.em()
+        if clazy != em:
+            fa = self.monoid.fa
+            node.values = [fa(v, clazy) for v in node.values]
+            node.clazy = em
+        return node.values
+
+    def _pull(self, node: ChunkNode[X, M]) -> None:
+        fx = self.monoid.fx
+        length = len(node.values)
+        acc = node.cacc
+        left = node.left
+        if left is not None:
+            self._eval(left)
+            length += left.length
+            acc = fx(left.acc, acc)
+        right = node.right
+        if right is not None:
+            self._eval(right)
+            length += right.length
+            acc = fx(acc, right.acc)
+        node.length = length
+        node.acc = acc
+
+    def _set_chunk(self, node: ChunkNode[X, M], values: List[X]) -> None:
+        node.values = values
+        node.cacc = reduce(self.monoid.fx, values)
+
+    def _split(self, node: Optional[ChunkNode[X, M]],
+               index: int) -> Tuple[Optional[ChunkNode[X, M]], Optional[ChunkNode[X, M]]]:
+        # RBST._split と同じく経路を積んで下から繋ぎ直す。 index がチャンクの途中なら、そのチャンクを二つに分ける
+        path: List[Tuple[ChunkNode[X, M], bool]] = []
+        left: Optional[ChunkNode[X, M]] = None
+        right: Optional[ChunkNode[X, M]] = None
+        while node is not None:
+            self._eval(node)
+            cnt = node.left.length if node.left is not None else 0
+            size = len(node.values)
+            if index <= cnt:
+                path.append((node, False))
+                node = node.left
+            elif index >= cnt + size:
+                path.append((node, True))
+                index -= cnt + size
+                node = node.right
+            else:
+                values = self._materialize(node)
+                k = index - cnt
+                tail = self._new_node(values[k:])
+                self._set_chunk(node, values[:k])
+                tail.right = node.right
+                node.right = None
+                self._pull(node)
+                self._pull(tail)
+                left, right = node, tail
+                break
+
+        for node, to_left in reversed(path):
+            if to_left:
+                node.right = left
+                self._pull(node)
+                left = node
+            else:
+                node.left = right
+                self._pull(node)
+                right = node
+        return left, right
+
+    def _merge(self, left: Optional[ChunkNode[X, M]],
+               right: Optional[ChunkNode[X, M]]) -> Optional[ChunkNode[X, M]]:
+        path: List[Tuple[ChunkNode[X, M], bool]] = []
+        random = self.random.random
+        while left is not None and right is not None:
+            self._eval(left)
+            self._eval(right)
+            if left.length / (left.length + right.length) < random():
+                path.append((right, True))
+                right = right.left
+            else:
+                path.append((left, False))
+                left = left.right
+
+        node = right if left is None else left
+        for parent, is_right in reversed(path):
+            if is_right:
+                parent.left = node
+            else:
+                parent.right = node
+            self._pull(parent)
+            node = parent
+        return node
+
+    def _descend(self, index: int) -> Tuple[List[ChunkNode[X, M]], int]:
+        """index を含むチャンクまでの経路と、チャンク内の位置を返す。経路上は評価済み"""
+        path = []
+        node = self.root
+        while node is not None:
+            self._eval(node)
+            path.append(node)
+            cnt = node.left.length if node.left is not None else 0
+            size = len(node.values)
+            if index < cnt:
+                node = node.left
+            elif index < cnt + size:
+                return path, index - cnt
+            else:
+                index -= cnt + size
+                node = node.right
+        raise IndexError()
+
+    def _pull_path(self, path: List[ChunkNode[X, M]]) -> None:
+        for node in reversed(path):
+            self._pull(node)
+
+    def _compact(self) -> None:
+        # 切れ端のチャンクが増えたら作り直す。償却するとチャンクの大きさ程度の手間
+        if self.nodes > 2 * (len(self) // self.chunk_size) + 16:
+            values = list(self)
+            self.nodes = 0
+            self.root = self._build(values)
+
+    def __len__(self) -> int:
+        if self.root is None:
+            return 0
+        return self.root.length
+
+    @overload
+    def __getitem__(self, index: int) -> X:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> ChunkedRBST[X, M]:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            if index < 0:
+                index += len(self)
+            if not (0 <= index < len(self)):
+                raise IndexError()
+            path, k = self._descend(index)
+            return self._materialize(path[-1])[k]
+        elif isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            indices = range(start, stop, step)
+            values: List[X] = []
+            if indices:
+                lo = min(indices[0], indices[-1])
+                hi = max(indices[0], indices[-1]) + 1
+                temp, right = self._split(self.root, hi)
+                left, center = self._split(temp, lo)
+                part = list(self._iter_node(center))
+                self.root = self._merge(self._merge(left, center), right)
+                self._compact()
+                values = [part[i - lo] for i in indices]
+            return type(self)(self.monoid, self.random, values, self.chunk_size)
+        raise IndexError()
+
+    def insert(self, index: int, value: X) -> None:
+        length = len(self)
+        if index < 0:
+            index = max(index + length, 0)
+        index = min(index, length)
+        if self.root is None:
+            self.root = self._new_node([value])
+            return
+        if index == length:
+            path, k = self._descend(length - 1)
+            k += 1
+        else:
+            path, k = self._descend(index)
+        node = path[-1]
+        values = self._materialize(node)
+        values.insert(k, value)
+        node.cacc = reduce(self.monoid.fx, values)
+        self._pull_path(path)
+        if len(values) > self.chunk_size * 2:
+            # 溢れたチャンクは真ん中で split して二つに分け、 merge で繋ぎ直して釣り合いを保つ
+            left, right = self._split(self.root, index - k + len(values) // 2)
+            self.root = self._merge(left, right)
+
+    def append(self, value: X) -> None:
+        self.insert(len(self), value)
+
+    def extend(self, values: Iterable[X]) -> None:
+        # 少ないときは末尾のチャンクに足し、溢れたら insert と同じく split / merge で二つに分ける。
+        # 多いときは末尾のチャンクを chunk_size * 2 まで埋めてから、残りで新しいチャンクを作る
+        values = list(values)
+        if not values:
+            return
+        if self.root is not None:
+            length = len(self)
+            path, k = self._descend(length - 1)
+            node = path[-1]
+            limit = self.chunk_size * 2
+            room = len(values) if len(values) < self.chunk_size else limit - len(node.values)
+            if room > 0:
+                chunk = self._materialize(node)
+                chunk.extend(values[:room])
+                node.cacc = reduce(self.monoid.fx, chunk)
+                self._pull_path(path)
+                values = values[room:]
+                if len(chunk) > limit:
+                    left, right = self._split(self.root, length - 1 - k + len(chunk) // 2)
+                    self.root = self._merge(left, right)
+        self.root = self._merge(self.root, self._build(values))
+
+    def _erase(self, start: int, stop: int) -> None:
+        if start >= stop:
+            return
+        temp, right = self._split(self.root, stop)
+        left, center = self._split(temp, start)
+        self.nodes -= sum(1 for _ in self._iter_chunks(center))
+        self.root = self._merge(left, right)
+        self._compact()
+
+    @overload
+    def __delitem__(self, index: int) -> None:
+        ...
+
+    @overload
+    def __delitem__(self, index: slice) -> None:
+        ...
+
+    def __delitem__(self, index):
+        if isinstance(index, int):
+            if index < 0:
+                index += len(self)
+            if not (0 <= index < len(self)):
+                raise IndexError()
+            path, k = self._descend(index)
+            node = path[-1]
+            values = self._materialize(node)
+            del values[k]
+            if values:
+                node.cacc = reduce(self.monoid.fx, values)
+                self._pull_path(path)
+                return
+            # 空になった節点は子同士を繋いで置き換える
+            self.nodes -= 1
+            child = self._merge(node.left, node.right)
+            path.pop()
+            if not path:
+                self.root = child
+                return
+            parent = path[-1]
+            if parent.left is node:
+                parent.left = child
+            else:
+                parent.right = child
+            self._pull_path(path)
+        elif isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                self._erase(start, stop)
+                return
+            indices = range(start, stop, step)
+            if not indices:
+                return
+            lo = min(indices[0], indices[-1])
+            hi = max(indices[0], indices[-1]) + 1
+            drop = range(start - lo, stop - lo, step)
+            temp, right = self._split(self.root, hi)
+            left, center = self._split(temp, lo)
+            values = [v for k, v in enumerate(self._iter_node(center)) if k not in drop]
+            self.nodes -= sum(1 for _ in self._iter_chunks(center))
+            self.root = self._merge(self._merge(left, self._build(values)), right)
+            self._compact()
+        else:
+            raise IndexError()
+
+    def update(self, start: int, end: int, value: M) -> None:
+        """[start, end) に value を作用させる。木の形は変えない"""
+        start, end = slice(start, end).indices(len(self))[:2]
+        if start < end:
+            self._update(self.root, start, end, value)
+
+    def _update(self, node: Optional[ChunkNode[X, M]], start: int, end: int, value: M) -> None:
+        if node is None or end <= 0 or node.length <= start:
+            return
+        if start <= 0 and node.length <= end:
+            node.lazy = self._compose(node.lazy, value)
+            return
+        self._eval(node)
+        cnt = node.left.length if node.left is not None else 0
+        size = len(node.values)
+        self._update(node.left, start, end, value)
+        lo = max(start - cnt, 0)
+        hi = min(end - cnt, size)
+        if lo < hi:
+            if lo == 0 and hi == size:
+                node.clazy = self._compose(node.clazy, value)
+                node.cacc = self.monoid.fa(node.cacc, self.monoid.fp(value, size))
+            else:
+                values = self._materialize(node)
+                fa = self.monoid.fa
+                values[lo:hi] = [fa(v, value) for v in values[lo:hi]]
+                node.cacc = reduce(self.monoid.fx, values)
+        self._update(node.right, start - cnt - size, end - cnt - size, value)
+        self._pull(node)
+
+    @overload
+    def get_acc(self, index: int) -> X:
+        ...
+
+    @overload
+    def get_acc(self, index: slice) -> X:
+        ...
+
+    def get_acc(self, index):
+        if isinstance(index, int):
+            return self[index]
+        elif isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._fold(self.root, start, stop)
+            values = map(self.__getitem__, range(start, stop, step))
+            return reduce(self.monoid.fx, values, self.monoid.ex())
+        raise IndexError()
+
+    def _fold(self, node: Optional[ChunkNode[X, M]], start: int, end: int) -> X:
+        if node is None or end <= 0 or node.length <= start or end <= start:
+            return self.monoid.ex()
+        self._eval(node)
+        if start <= 0 and node.length <= end:
+            return node.acc
+        fx = self.monoid.fx
+        cnt = node.left.length if node.left is not None else 0
+        size = len(node.values)
+        acc = self._fold(node.left, start, end)
+        lo = max(start - cnt, 0)
+        hi = min(end - cnt, size)
+        if lo < hi:
+            if lo == 0 and hi == size:
+                acc = fx(acc, node.cacc)
+            else:
+                acc = reduce(fx, self._materialize(node)[lo:hi], acc)
+        return fx(acc, self._fold(node.right, start - cnt - size, end - cnt - size))
+
+    def _iter_chunks(self, node: Optional[ChunkNode[X, M]]) -> Iterator[ChunkNode[X, M]]:
+        stack: List[ChunkNode[X, M]] = []
+        while stack or node is not None:
+            if node is not None:
+                self._eval(node)
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                yield node
+                node = node.right
+
+    def _iter_node(self, node: Optional[ChunkNode[X, M]]) -> Iterator[X]:
+        materialize = self._materialize
+        for chunk in self._iter_chunks(node):
+            yield from materialize(chunk)
+
+    def __iter__(self) -> Iterator[X]:
+        return self._iter_node(self.root)
+
+    def __reversed__(self) -> Iterator[X]:
+        stack: List[ChunkNode[X, M]] = []
+        node = self.root
+        while stack or node is not None:
+            if node is not None:
+                self._eval(node)
+                stack.append(node)
+                node = node.right
+            else:
+                node = stack.pop()
+                yield from reversed(self._materialize(node))
+                node = node.left
+
+
+def bench(n: int = 10 ** 5) -> None:
+    import tracemalloc
+    from time import perf_counter
+
+    from rbst import RBST
+
+    for cls in (RBST, ChunkedRBST):
+        tracemalloc.start()
+        t0 = perf_counter()
+        tree = cls(accumulate_monoid, Random(0), range(n))
+        t1 = perf_counter()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        total = sum(tree)
+        t2 = perf_counter()
+        print(f'{cls.__name__} {n=} build={t1 - t0:.3f}s iter={t2 - t1:.3f}s '
+              f'memory={memory / n:.1f}B/element {total == sum(range(n))}')
+
+
+if __name__ == '__main__':
+    bench()
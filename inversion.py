@@ -0,0 +1,123 @@
+"""転倒数と順位まわりのまとめ処理
+
+BinaryIndexedTree で右から掃く方法と、マージソートで数える方法を持つ。
+method='auto' では、長さが _AUTO_MIN_LENGTH 以上で値が狭い範囲の int なら座標圧縮なしで BIT を使い、
+それ以外 (短い列、広い範囲の int や int 以外の比較可能な値) はマージソートを使う。
+短い列では BIT を作る手間のほうが大きい。
+"""
+from typing import Any, Dict, Hashable, List, Sequence
+
+from binary_indexed_tree import BinaryIndexedTree
+
+
+# これより短い列は BIT を作るよりマージソートのほうが速い
+_AUTO_MIN_LENGTH = 16
+
+
+def compress(seq: Sequence[Any]) -> List[int]:
+    """値を 0 始まりの順位に置き換える。等しい値は同じ順位。"""
+    ranks = {v: i for i, v in enumerate(sorted(set(seq)))}
+    return [ranks[v] for v in seq]
+
+
+def _is_dense_int(seq: Sequence[Any]) -> bool:
+    # 値が int で、範囲が長さの 2 倍未満なら圧縮せずそのまま BIT に載せられる
+    return bool(seq) and all(type(v) is int for v in seq) and max(seq) - min(seq) < 2 * len(seq)
+
+
+def _ranks(seq: Sequence[Any]) -> List[int]:
+    if _is_dense_int(seq):
+        lo = min(seq)
+        return [v - lo for v in seq]
+    return compress(seq)
+
+
+def count_smaller_right(seq: Sequence[Any]) -> List[int]:
+    """各要素について、それより右にある真に小さい要素の数"""
+    ranks = _ranks(seq)
+    tree = BinaryIndexedTree(max(ranks, default=0) + 1)
+    add = tree.add
+    query = tree.query
+    result = [0] * len(ranks)
+    for i in range(len(ranks) - 1, -1, -1):
+        r = ranks[i] + 1
+        result[i] = query(r - 1)
+        add(r, 1)
+    return result
+
+
+def _inversion_count_bit(ranks: Sequence[int]) -> int:
+    tree = BinaryIndexedTree(max(ranks, default=0) + 1)
+    add = tree.add
+    query = tree.query
+    count = 0
+    for i, r in enumerate(ranks):
+        # 左にあって r より大きいものの数
+        count += i - query(r + 1)
+        add(r + 1, 1)
+    return count
+
+
+def _inversion_count_merge(seq: Sequence[Any]) -> int:
+    # 下から幅を倍々にしていく非再帰のマージソート
+    src = list(seq)
+    length = len(src)
+    dst = [None] * length
+    count = 0
+    width = 1
+    while width < length:
+        for start in range(0, length, width * 2):
+            mid = min(start + width, length)
+            end = min(start + width * 2, length)
+            i, j, k = start, mid, start
+            while i < mid and j < end:
+                if src[j] < src[i]:
+                    dst[k] = src[j]
+                    j += 1
+                    count += mid - i
+                else:
+                    dst[k] = src[i]
+                    i += 1
+                k += 1
+            dst[k:k + mid - i] = src[i:mid]
+            k += mid - i
+            dst[k:k + end - j] = src[j:end]
+        src, dst = dst, src
+        width *= 2
+    return count
+
+
+def inversion_count(seq: Sequence[Any], method: str = 'auto') -> int:
+    """i < j かつ seq[i] > seq[j] となる組の数
+
+    method='auto' は長さと値の型・範囲で 'bit' か 'merge' を選ぶ。"""
+    if method == 'auto':
+        method = 'bit' if len(seq) >= _AUTO_MIN_LENGTH and _is_dense_int(seq) else 'merge'
+    if method == 'bit':
+        return _inversion_count_bit(_ranks(seq))
+    elif method == 'merge':
+        return _inversion_count_merge(seq)
+    raise ValueError(method)
+
+
+def kendall_tau_distance(a: Sequence[Hashable], b: Sequence[Hashable], method: str = 'auto') -> int:
+    """同じ要素を並べ替えた 2 つの順列で、順序が食い違う組の数"""
+    if len(a) != len(b):
+        raise ValueError('length mismatch')
+    position: Dict[Hashable, int] = {v: i for i, v in enumerate(b)}
+    if len(position) != len(b) or len(set(a)) != len(a):
+        raise ValueError('duplicate element')
+    if position.keys() != set(a):
+        raise ValueError('element mismatch')
+    return inversion_count([position[v] for v in a], method)
+
+
+def main() -> None:
+    seq = [3, 1, 4, 1, 5, 9, 2, 6]
+    print(count_smaller_right(seq))
+    print(inversion_count(seq), inversion_count(seq, 'merge'))
+    print(kendall_tau_distance('abcde', 'baced'))
+
+
+if __name__ == '__main__':
+    main()
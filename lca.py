@@ -0,0 +1,105 @@
+"""最小共通祖先 (Lowest Common Ancestor)
+
+オイラーツアーを作り、訪問順の深さの最小値を BlockSparseTable で引く。
+構築 O(n) 、 query は O(1) 。表はブロックごとにしか持たないので、 SparseTable の n log n 個より小さい。
+ツアーは明示的なスタックで作るので、深い木でも再帰上限に当たらない。
+"""
+from typing import Iterable, List, Optional, Sequence
+
+from sparsetable import BlockSparseTable
+
+
+class LCA:
+    depth: List[int]
+    first: List[int]
+    tour: List[int]
+
+    def __init__(self, adjacency: Sequence[Iterable[int]], root: int = 0) -> None:
+        n = len(adjacency)
+        self.root = root
+        self.depth = depth = [0] * n
+        self.first = first = [0] * n
+        self.tour = tour = []
+
+        # 深さと頂点を depth * n + v の一つの int に詰め、 min だけで argmin を取る
+        keys: List[int] = []
+        visited = [False] * n
+        visited[root] = True
+        stack = [(root, iter(adjacency[root]))]
+        first[root] = 0
+        tour.append(root)
+        keys.append(root)
+        while stack:
+            v, it = stack[-1]
+            for c in it:
+                if visited[c]:
+                    continue
+                visited[c] = True
+                depth[c] = depth[v] + 1
+                first[c] = len(tour)
+                tour.append(c)
+                keys.append(depth[c] * n + c)
+                stack.append((c, iter(adjacency[c])))
+                break
+            else:
+                stack.pop()
+                if stack:
+                    p = stack[-1][0]
+                    tour.append(p)
+                    keys.append(depth[p] * n + p)
+        if not all(visited):
+            # 森や辺の欠けた入力では、届かない頂点の first が 0 のまま残る
+            raise ValueError('graph is not connected')
+        self._n = n
+        self._table: BlockSparseTable[int] = BlockSparseTable(keys, min)
+
+    @classmethod
+    def from_parents(cls, parents: Sequence[Optional[int]]) -> 'LCA':
+        """parents[v] が v の親。根は None か負数か自分自身"""
+        adjacency: List[List[int]] = [[] for _ in range(len(parents))]
+        root = 0
+        for v, p in enumerate(parents):
+            if p is None or p < 0 or p == v:
+                root = v
+            else:
+                adjacency[p].append(v)
+        return cls(adjacency, root)
+
+    def lca(self, u: int, v: int) -> int:
+        left = self.first[u]
+        right = self.first[v]
+        if left > right:
+            left, right = right, left
+        return self._table.query(left, right + 1) % self._n
+
+    def lca_many(self, us: Iterable[int], vs: Iterable[int]) -> List[int]:
+        first = self.first
+        query = self._table.query
+        n = self._n
+        result = []
+        for u, v in zip(us, vs):
+            left = first[u]
+            right = first[v]
+            if left > right:
+                left, right = right, left
+            result.append(query(left, right + 1) % n)
+        return result
+
+    def distance(self, u: int, v: int) -> int:
+        depth = self.depth
+        return depth[u] + depth[v] - 2 * depth[self.lca(u, v)]
+
+
+def main() -> None:
+    #     0
+    #    / \
+    #   1   2
+    #  / \   \
+    # 3   4   5
+    lca = LCA.from_parents([-1, 0, 0, 1, 1, 2])
+    print(lca.lca(3, 4), lca.lca(3, 5), lca.lca(4, 1))
+    print(lca.distance(3, 4), lca.distance(3, 5))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import bisect
 import collections
 import operator
 from functools import partial, reduce
 from random import Random
-from typing import (Callable, Deque, Generic, Iterable, Iterator, NamedTuple,
-                    Optional, Sequence, Tuple, TypeVar, overload)
+from typing import (Callable, Deque, Generic, Iterable, Iterator, List,
+                    NamedTuple, Optional, Sequence, Tuple, TypeVar, overload)
 
 
 class RBSTError(Exception):
@@ -32,48 +33,98 @@ class Monoid(NamedTuple):
 
 
 class Node(Generic[X, M]):
+    __slots__ = ('value', 'acc', 'lazy', 'left', 'right', 'length', 'racc', 'rev')
+
     value: X
     acc: X
+    racc: X
     lazy: M
     left: Optional[Node[X, M]]
     right: Optional[Node[X, M]]
     length: int
+    rev: bool
 
     def __init__(self, value: X, lazy: M) -> None:
         self.value = value
         self.acc = value
+        self.racc = value
         self.lazy = lazy
         self.left = None
         self.right = None
         self.length = 1
+        self.rev = False
 
 
 class RBST(Sequence[X], Iterable[X], Generic[X, M]):
     random: Random = Random()
     root: Optional[Node[X, M]]
+    version: int = 0
 
-    def __init__(self, monoid: Monoid, random_generagor: Optional[Random] = None) -> None:
-        self.root = None
+    def __init__(self, monoid: Monoid, random_generagor: Optional[Random] = None, values: Iterable[X] = ()) -> None:
         self.monoid = monoid
         if random_generagor:
             self.random = random_generagor
+        self.root = self._build(values)
+
+    def _build(self, values: Iterable[X]) -> Optional[Node[X, M]]:
+        """values を並べた平衡な木を、中央で二分しながら O(n) で作る。"""
+        values = tuple(values)
+        em = self.monoid.em
+        pull = self._pull
+
+        def build(start: int, end: int) -> Optional[Node[X, M]]:
+            if start >= end:
+                return None
+            mid = (start + end) // 2
+            node = Node(values[mid], em())
+            node.left = build(start, mid)
+            node.right = build(mid + 1, end)
+            pull(node, None)
+            return node
+
+        return build(0, len(values))
 
     def _propagate(self, node: Node[X, M]) -> None:
-        node.length = 1
-        node.acc = node.value
-        if node.left is not None:
-            self._eval(node.left)
-            node.length += node.left.length
-            node.acc = self.monoid.fx(node.acc, node.left.acc)
-        if node.right is not None:
-            self._eval(node.right)
-            node.length += node.right.length
-            node.acc = self.monoid.fx(node.acc, node.right.acc)
+        self._eval(node.left)
+        self._eval(node.right)
+        self._pull(node, None)
+
+    def _pull(self, node: Node[X, M], other: Optional[Node[X, M]]) -> None:
+        """_propagate と同じだが、評価済みの子は評価し直さず other だけを評価する
+
+        acc は中順 (左, 自分, 右) 、 racc はその逆順の畳み込み。"""
+        if other is not None and (other.rev or other.lazy != self.monoid.em()):
+            self._eval(other)
+        fx = self.monoid.fx
+        length = 1
+        acc = racc = node.value
+        left = node.left
+        if left is not None:
+            length += left.length
+            acc = fx(left.acc, acc)
+            racc = fx(racc, left.racc)
+        right = node.right
+        if right is not None:
+            length += right.length
+            acc = fx(acc, right.acc)
+            racc = fx(right.racc, racc)
+        node.length = length
+        node.acc = acc
+        node.racc = racc
 
     def _eval(self, node: Optional[Node[X, M]]) -> None:
         if node is None:
             return
 
+        if node.rev:
+            left, right = node.left, node.right = node.right, node.left
+            if left is not None:
+                left.rev = not left.rev
+            if right is not None:
+                right.rev = not right.rev
+            node.acc, node.racc = node.racc, node.acc
+            node.rev = False
+
         em = self.monoid.em()
 
         if node.lazy == em:
@@ -85,7 +136,9 @@ class RBST(Sequence[X], Iterable[X], Generic[X, M]):
             node.right.lazy = self.monoid.fm(node.right.lazy, node.lazy)
 
         node.value = self.monoid.fa(node.value, node.lazy)
-        node.acc = self.monoid.fa(node.acc, self.monoid.fp(node.lazy, node.length))
+        lazy = self.monoid.fp(node.lazy, node.length)
+        node.acc = self.monoid.fa(node.acc, lazy)
+        node.racc = self.monoid.fa(node.racc, lazy)
         node.lazy = em
 
     def _find(self, index: int) -> Node[X, M]:
@@ -119,6 +172,32 @@ class RBST(Sequence[X], Iterable[X], Generic[X, M]):
         temp = self._merge(center, right)
         self.root = self._merge(left, temp)
 
+    def reverse(self, start: int = 0, end: Optional[int] = None) -> None:
+        """[start, end) を O(log n) で反転する。反転は遅延評価で子へ伝える。"""
+        start, end = slice(start, end).indices(len(self))[:2]
+        if end - start < 2:
+            return
+        temp, right = self._split(self.root, end)
+        left, center = self._split(temp, start)
+        assert center
+        center.rev = not center.rev
+        self.root = self._merge(self._merge(left, center), right)
+
+    def rotate(self, start: int, end: int, k: int = 1) -> None:
+        """[start, end) を collections.deque.rotate と同じ向きに k だけ回す。 O(log n)"""
+        start, end = slice(start, end).indices(len(self))[:2]
+        length = end - start
+        if length < 2:
+            return
+        k %= length
+        if k == 0:
+            return
+        temp, right = self._split(self.root, end)
+        left, center = self._split(temp, start)
+        head, tail = self._split(center, length - k)
+        center = self._merge(tail, head)
+        self.root = self._merge(self._merge(left, center), right)
+
     @overload
     def get_acc(self, index: int) -> X:
         ...
@@ -133,18 +212,160 @@ class RBST(Sequence[X], Iterable[X], Generic[X, M]):
         elif isinstance(index, slice):
             if index.step is None or index.step == 1:
                 start, stop = index.indices(len(self))[:2]
-                temp, right = self._split(self.root, stop)
-                left, center = self._split(temp, start)
-                acc = center.acc if center else self.monoid.ex()
-                temp = self._merge(left, center)
-                self.root = self._merge(temp, right)
-                return acc
+                return self._fold(start, stop)
             else:
                 nodes = self._find_nodes(index)
                 values = map(operator.attrgetter('value'), nodes)
                 return reduce(self.monoid.fx, values, self.monoid.ex())
         raise IndexError()
 
+    def _compose(self, lazy: M, pending: M) -> M:
+        # 単位元を fm に渡さない (rmq_monoid の fm は右側をそのまま返すため)
+        if pending == self.monoid.em():
+            return lazy
+        return self.monoid.fm(lazy, pending)
+
+    def _apply(self, x: X, lazy: M, length: int) -> X:
+        if lazy == self.monoid.em():
+            return x
+        return self.monoid.fa(x, self.monoid.fp(lazy, length))
+
+    def _fold(self, start: int, stop: int) -> X:
+        """[start, stop) の畳み込みを、木を書き換えずに根から降りて求める。
+
+        降りる途中の遅延評価は pending に、反転は flip に合成して持ち回り、節点には書き戻さない。"""
+        fx = self.monoid.fx
+        compose = self._compose
+        apply = self._apply
+        node = self.root
+        pending = self.monoid.em()
+        flip = False
+        if start >= stop or node is None:
+            return self.monoid.ex()
+
+        # 区間が左右の子に分かれる節点まで降りる
+        while True:
+            flip ^= node.rev
+            pending = compose(node.lazy, pending)
+            if start == 0 and stop == node.length:
+                return apply(node.racc if flip else node.acc, pending, node.length)
+            lt, rt = (node.right, node.left) if flip else (node.left, node.right)
+            cnt = lt.length if lt is not None else 0
+            if stop <= cnt:
+                node = lt
+            elif start > cnt:
+                start -= cnt + 1
+                stop -= cnt + 1
+                node = rt
+            else:
+                break
+        top = pending
+        top_flip = flip
+        result = apply(node.value, top, 1)
+        stop -= cnt + 1
+
+        # 左の子からは start 以降を、右から左へ集める
+        child = lt
+        pending = top
+        flip = top_flip
+        while child is not None:
+            flip ^= child.rev
+            pending = compose(child.lazy, pending)
+            if start == 0:
+                result = fx(apply(child.racc if flip else child.acc, pending, child.length), result)
+                break
+            lt, rt = (child.right, child.left) if flip else (child.left, child.right)
+            cnt = lt.length if lt is not None else 0
+            if start <= cnt:
+                value = apply(child.value, pending, 1)
+                if rt is not None:
+                    f = flip ^ rt.rev
+                    value = fx(value, apply(rt.racc if f else rt.acc, compose(rt.lazy, pending), rt.length))
+                result = fx(value, result)
+                child = lt
+            else:
+                start -= cnt + 1
+                child = rt
+
+        # 右の子からは stop 未満を、左から右へ集める
+        child = node.left if top_flip else node.right
+        pending = top
+        flip = top_flip
+        while child is not None and stop > 0:
+            flip ^= child.rev
+            pending = compose(child.lazy, pending)
+            if stop == child.length:
+                result = fx(result, apply(child.racc if flip else child.acc, pending, child.length))
+                break
+            lt, rt = (child.right, child.left) if flip else (child.left, child.right)
+            cnt = lt.length if lt is not None else 0
+            if stop > cnt:
+                value = apply(child.value, pending, 1)
+                if lt is not None:
+                    f = flip ^ lt.rev
+                    value = fx(apply(lt.racc if f else lt.acc, compose(lt.lazy, pending), lt.length), value)
+                result = fx(result, value)
+                stop -= cnt + 1
+                child = rt
+            else:
+                child = lt
+
+        return result
+
+    def get_acc_many(self, ranges: Iterable[Tuple[int, int]]) -> List[X]:
+        """複数の半開区間 [start, stop) の畳み込みを、木を書き換えずにまとめて求める。
+
+        節点ごとに、その節点と交わる区間だけを持って中順に降りるので、
+        区間同士が共有する経路は一度しか辿らない。"""
+        fx = self.monoid.fx
+        compose = self._compose
+        apply = self._apply
+        ex = self.monoid.ex
+        length = len(self)
+        bounds = [slice(start, stop).indices(length)[:2] for start, stop in ranges]
+        results = [ex() for _ in bounds]
+        live = [i for i, (start, stop) in enumerate(bounds) if start < stop]
+        if self.root is None or not live:
+            return results
+
+        # ('node', 節点, 先祖から来た遅延評価, 反転, 部分木の先頭の添字, 交わる区間) か
+        # ('value', 節点の値, 値を含む区間) を積み、中順に処理する
+        stack: List[Tuple] = [('node', self.root, self.monoid.em(), False, 0, live)]
+        while stack:
+            frame = stack.pop()
+            if frame[0] == 'value':
+                _, value, ids = frame
+                for i in ids:
+                    results[i] = fx(results[i], value)
+                continue
+            _, node, pending, flip, base, ids = frame
+            lazy = compose(node.lazy, pending)
+            flip ^= node.rev
+            end = base + node.length
+            partial = []
+            for i in ids:
+                start, stop = bounds[i]
+                if start <= base and end <= stop:
+                    results[i] = fx(results[i], apply(node.racc if flip else node.acc, lazy, node.length))
+                else:
+                    partial.append(i)
+            if not partial:
+                continue
+            lt, rt = (node.right, node.left) if flip else (node.left, node.right)
+            mid = base + (lt.length if lt is not None else 0)
+            if rt is not None:
+                ids = [i for i in partial if bounds[i][1] > mid + 1]
+                if ids:
+                    stack.append(('node', rt, lazy, flip, mid + 1, ids))
+            ids = [i for i in partial if bounds[i][0] <= mid < bounds[i][1]]
+            if ids:
+                stack.append(('value', apply(node.value, lazy, 1), ids))
+            if lt is not None:
+                ids = [i for i in partial if bounds[i][0] < mid]
+                if ids:
+                    stack.append(('node', lt, lazy, flip, base, ids))
+        return results
+
     @overload
     def __getitem__(self, index: int) -> X:
         ...
@@ -159,11 +380,76 @@ class RBST(Sequence[X], Iterable[X], Generic[X, M]):
             return node.value
         elif isinstance(index, slice):
             tree = type(self)(self.monoid)
-            for node in self._find_nodes(index):
-                tree.append(node.value)
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                # 連続した範囲は切り出した部分木を形ごと写す
+                if start < stop:
+                    temp, right = self._split(self.root, stop)
+                    left, center = self._split(temp, start)
+                    tree.root = self._copy(center)
+                    self.root = self._merge(self._merge(left, center), right)
+                return tree
+            indices = range(start, stop, step)
+            if indices:
+                lo = min(indices[0], indices[-1])
+                values = self._values(lo, max(indices[0], indices[-1]) + 1)
+                tree.root = tree._build(values[i - lo] for i in indices)
             return tree
         raise IndexError()
 
+    def _values(self, start: int, end: int) -> List[X]:
+        """[start, end) の値を一度の中順走査で集める"""
+        temp, right = self._split(self.root, end)
+        left, center = self._split(temp, start)
+        values = [node.value for node in self._iter_nodes(center)]
+        self.root = self._merge(self._merge(left, center), right)
+        return values
+
+    def _iter_nodes(self, node: Optional[Node[X, M]]) -> Iterator[Node[X, M]]:
+        """node 以下の節点を中順に、遅延評価を反映しながら返す"""
+        stack: List[Node[X, M]] = []
+        while stack or node is not None:
+            if node is not None:
+                self._eval(node)
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                yield node
+                node = node.right
+
+    @staticmethod
+    def _copy_node(node: Node[X, M]) -> Node[X, M]:
+        new_node = Node(node.value, node.lazy)
+        new_node.acc = node.acc
+        new_node.racc = node.racc
+        new_node.length = node.length
+        new_node.rev = node.rev
+        new_node.left = node.left
+        new_node.right = node.right
+        return new_node
+
+    def _copy(self, node: Optional[Node[X, M]]) -> Optional[Node[X, M]]:
+        """node 以下を同じ形のまま写す。遅延評価は写す前に押し下げておく。 O(k)"""
+        if node is None:
+            return None
+        copy_node = self._copy_node
+        eval_meth = self._eval
+        eval_meth(node)
+        root = copy_node(node)
+        stack = [(node, root)]
+        while stack:
+            src, dst = stack.pop()
+            if src.left is not None:
+                eval_meth(src.left)
+                dst.left = copy_node(src.left)
+                stack.append((src.left, dst.left))
+            if src.right is not None:
+                eval_meth(src.right)
+                dst.right = copy_node(src.right)
+                stack.append((src.right, dst.right))
+        return root
+
     def _erase(self, node: Optional[Node[X, M]], start: int, end: int) -> Optional[Node[X, M]]:
         temp, right = self._split(node, end)
         left = self._split(temp, start)[0]
@@ -188,8 +474,18 @@ class RBST(Sequence[X], Iterable[X], Generic[X, M]):
             if step == 1:
                 self.root = self._erase(self.root, start, stop)
             else:
-                for i in reversed(range(start, stop, step)):
-                    self.root = self._erase(self.root, i, i + 1)
+                # 飛び飛びの削除は範囲を一度取り出し、残りで作り直す
+                indices = range(start, stop, step)
+                if not indices:
+                    return
+                lo = min(indices[0], indices[-1])
+                hi = max(indices[0], indices[-1]) + 1
+                drop = range(start - lo, stop - lo, step)
+                temp, right = self._split(self.root, hi)
+                left, center = self._split(temp, lo)
+                values = [node.value for k, node in enumerate(self._iter_nodes(center)) if k not in drop]
+                center = self._build(values)
+                self.root = self._merge(self._merge(left, center), right)
         else:
             raise IndexError()
 
@@ -213,12 +509,25 @@ class RBST(Sequence[X], Iterable[X], Generic[X, M]):
         self.root = new_node
 
     def extend(self, values: Iterable[X]) -> None:
-        root = self.root
-        merge_meth = self._merge
-        em_meth = self.monoid.ex
-        for value in values:
-            root = merge_meth(root, Node(value, em_meth()))
-        self.root = root
+        self.root = self._merge(self.root, self._build(values))
+
+    def insert_many(self, index: int, values: Iterable[X]) -> None:
+        """values を index の前にまとめて挿入する。
+
+        values から O(k) で木を作り、 split 1 回と merge 2 回で繋ぐ。 index の扱いは list.insert と同じ。"""
+        index = slice(index, None).indices(len(self))[0]
+        left, right = self._split(self.root, index)
+        self.root = self._merge(self._merge(left, self._build(values)), right)
+
+    def pop_range(self, start: int, end: int) -> RBST[X, M]:
+        """[start, end) を部分木ごと切り離し、新しい木として返す。 O(log n)"""
+        start, end = slice(start, end).indices(len(self))[:2]
+        tree = type(self)(self.monoid, self.random)
+        if start < end:
+            temp, right = self._split(self.root, end)
+            left, tree.root = self._split(temp, start)
+            self.root = self._merge(left, right)
+        return tree
 
     def _debug_node(self) -> None:
         if self.root is None:
@@ -236,46 +545,111 @@ class RBST(Sequence[X], Iterable[X], Generic[X, M]):
             print(f'{depth_str} {node.value} {node.acc} {node.lazy}')
 
     def __iter__(self) -> Iterator[X]:
-        return self._iter_inner(self.root)
-
-    def _iter_inner(self, node: Optional[Node[X, M]]) -> Iterator[X]:
-        if node is None:
-            return
-        yield from self._iter_inner(node.left)
-        yield node.value
-        yield from self._iter_inner(node.right)
+        for node in self._iter_nodes(self.root):
+            yield node.value
 
     def __reversed__(self) -> Iterator[X]:
-        return self._reverse_inner(self.root)
+        stack: List[Node[X, M]] = []
+        node = self.root
+        while stack or node is not None:
+            if node is not None:
+                self._eval(node)
+                stack.append(node)
+                node = node.right
+            else:
+                node = stack.pop()
+                yield node.value
+                node = node.left
 
-    def _reverse_inner(self, node: Optional[Node[X, M]]) -> Iterator[X]:
-        if node is None:
+    def _bisect(self, node: Optional[Node[X, M]], value: X, right: bool = False) -> int:
+        """node 以下が昇順に並んでいるとみなし、 value を入れられる位置を返す。
+        right が真なら等しい値の右側、偽なら左側。"""
+        index = 0
+        while node is not None:
+            self._eval(node)
+            if (not value < node.value) if right else node.value < value:  # type: ignore
+                index += (node.left.length if node.left is not None else 0) + 1
+                node = node.right
+            else:
+                node = node.left
+        return index
+
+    def bisect_left(self, value: X) -> int:
+        """昇順に並んでいるとみなし、 value を入れられる最も左の位置を返す"""
+        return self._bisect(self.root, value)
+
+    def bisect_right(self, value: X) -> int:
+        """昇順に並んでいるとみなし、 value を入れられる最も右の位置を返す"""
+        return self._bisect(self.root, value, True)
+
+    def iter_range(self, start: int, stop: int) -> Iterator[X]:
+        """[start, stop) の値を、木を分割せずに O(log n + k) で順に返す"""
+        start, stop = slice(start, stop).indices(len(self))[:2]
+        count = stop - start
+        if count <= 0:
             return
-        yield from self._reverse_inner(node.right)
-        yield node.value
-        yield from self._reverse_inner(node.left)
 
-    def _split(self, node: Optional[Node[X, M]], index: int) -> Tuple[Optional[Node[X, M]], Optional[Node[X, M]]]:
-        if node is None:
-            return None, None
+        # start の節点まで降り、左へ進んだ節点 (= 後続) を積んでおく
+        stack: List[Node[X, M]] = []
+        node = self.root
+        index = start
+        while node is not None:
+            self._eval(node)
+            cnt = node.left.length if node.left is not None else 0
+            if index < cnt:
+                stack.append(node)
+                node = node.left
+            elif index == cnt:
+                stack.append(node)
+                break
+            else:
+                index -= cnt + 1
+                node = node.right
 
-        self._eval(node)
+        while count:
+            node = stack.pop()
+            yield node.value
+            count -= 1
+            node = node.right
+            while node is not None:
+                self._eval(node)
+                stack.append(node)
+                node = node.left
 
-        left: Optional[Node[X, M]]
-        center: Optional[Node[X, M]]
-        right: Optional[Node[X, M]]
+    def cursor(self, index: int = 0) -> RBSTCursor[X, M]:
+        """index を指すカーソルを返す。 t[i] を順に読むより速く走査できる"""
+        return RBSTCursor(self, index)
 
-        length = node.left.length if node.left is not None else 0
-        if length < index:
-            center, right = self._split(node.right, index - length - 1)
-            left = node
-            left.right = center
-            self._propagate(left)
-        else:
-            left, center = self._split(node.left, index)
-            right = node
-            right.left = center
-            self._propagate(right)
+    def _split(self, node: Optional[Node[X, M]], index: int) -> Tuple[Optional[Node[X, M]], Optional[Node[X, M]]]:
+        # 降りながら各節点を一度だけ評価し、経路を積んでおいて下から繋ぎ直す
+        self.version += 1
+        path: List[Tuple[Node[X, M], bool]] = []
+        em = self.monoid.em()
+        eval_meth = self._eval
+        while node is not None:
+            if node.rev or node.lazy != em:
+                eval_meth(node)
+            length = node.left.length if node.left is not None else 0
+            if length < index:
+                path.append((node, True))
+                index -= length + 1
+                node = node.right
+            else:
+                path.append((node, False))
+                node = node.left
+
+        left: Optional[Node[X, M]] = None
+        right: Optional[Node[X, M]] = None
+        pull = self._pull
+        for node, to_left in reversed(path):
+            if to_left:
+                node.right = left
+                pull(node, node.left)
+                left = node
+            else:
+                node.left = right
+                pull(node, node.right)
+                right = node
 
         return left, right
 
@@ -286,21 +660,37 @@ class RBST(Sequence[X], Iterable[X], Generic[X, M]):
         return left, right
 
     def _merge(self, left: Optional[Node[X, M]], right: Optional[Node[X, M]]) -> Optional[Node[X, M]]:
-        if left is None:
-            return right
-        if right is None:
-            return left
-
-        self._eval(left)
-        self._eval(right)
+        # 降りながら根になる側を積んでいき、最後に下から繋ぎ直す
+        self.version += 1
+        path: List[Tuple[Node[X, M], bool]] = []
+        eval_meth = self._eval
+        random = self.random.random
+        em = self.monoid.em()
+        if left is not None and right is not None:
+            eval_meth(left)
+            eval_meth(right)
+        while left is not None and right is not None:
+            if left.length / (left.length + right.length) < random():
+                path.append((right, True))
+                right = right.left
+                if right is not None and (right.rev or right.lazy != em):
+                    eval_meth(right)
+            else:
+                path.append((left, False))
+                left = left.right
+                if left is not None and (left.rev or left.lazy != em):
+                    eval_meth(left)
 
-        if left.length / (left.length + right.length) < self.random.random():
-            node = right
-            node.left = self._merge(left, node.left)
-        else:
-            node = left
-            node.right = self._merge(node.right, right)
-        self._propagate(node)
+        node = right if left is None else left
+        pull = self._pull
+        for parent, is_right in reversed(path):
+            if is_right:
+                parent.left = node
+                pull(parent, parent.right)
+            else:
+                parent.right = node
+                pull(parent, parent.left)
+            node = parent
         return node
 
     def merge(self, other: RBST[X, M]) -> RBST[X, M]:
@@ -309,6 +699,355 @@ class RBST(Sequence[X], Iterable[X], Generic[X, M]):
         return tree
 
 
+class RBSTCursor(Generic[X, M]):
+    """RBST の位置 index を指すカーソル
+
+    根から今の節点までの経路を持っておき、 next, prev は償却 O(1) 、
+    seek は今の位置からの距離 d に対して期待 O(log d) で動く。
+    index が len(tree) のときは末尾の次を指し、 value は読めない。
+    木を split, merge で組み替える操作 (スライスの取り出しも含む) や、他のカーソルの set の後は無効になり、
+    以後の操作は RBSTError を送出する。"""
+
+    def __init__(self, tree: RBST[X, M], index: int = 0) -> None:
+        self.tree = tree
+        # (節点, その部分木の先頭の位置) を根から順に積む。末尾の次を指すときは空
+        self.path: List[Tuple[Node[X, M], int]] = []
+        self.index = 0
+        self._reset(index)
+
+    def _check(self) -> None:
+        if self.version != self.tree.version:
+            raise RBSTError('cursor invalidated')
+
+    def _reset(self, index: int) -> None:
+        length = len(self.tree)
+        if index < 0:
+            index += length
+        if not (0 <= index <= length):
+            raise IndexError()
+        self.version = self.tree.version
+        self.path.clear()
+        self._descend(self.tree.root, 0, index)
+
+    def _descend(self, node: Optional[Node[X, M]], offset: int, index: int) -> None:
+        # 先頭の位置が offset の部分木 node から index の節点まで降りる
+        path = self.path
+        self.index = index
+        if index == len(self.tree):
+            path.clear()
+            return
+        eval_meth = self.tree._eval
+        while node is not None:
+            eval_meth(node)
+            path.append((node, offset))
+            cnt = node.left.length if node.left is not None else 0
+            if index < offset + cnt:
+                node = node.left
+            elif index == offset + cnt:
+                return
+            else:
+                offset += cnt + 1
+                node = node.right
+
+    @property
+    def value(self) -> X:
+        self._check()
+        if not self.path:
+            raise IndexError()
+        return self.path[-1][0].value
+
+    def next(self) -> None:
+        """一つ後ろへ進む"""
+        self._check()
+        path = self.path
+        if not path:
+            raise IndexError()
+        node = path[-1][0]
+        if node.right is not None:
+            self._descend(node.right, self.index + 1, self.index + 1)
+            return
+        # 左の子として登ってきた親が次の節点
+        while True:
+            child = path.pop()[0]
+            if not path or path[-1][0].left is child:
+                break
+        self.index += 1
+
+    def prev(self) -> None:
+        """一つ前へ戻る"""
+        self._check()
+        if self.index == 0:
+            raise IndexError()
+        path = self.path
+        if not path:
+            self._descend(self.tree.root, 0, self.index - 1)
+            return
+        node, offset = path[-1]
+        if node.left is not None:
+            self._descend(node.left, offset, self.index - 1)
+            return
+        while True:
+            child = path.pop()[0]
+            if path[-1][0].right is child:
+                break
+        self.index -= 1
+
+    def seek(self, index: int) -> None:
+        """index へ移る。両方を含む部分木まで登ってから降りる"""
+        self._check()
+        length = len(self.tree)
+        if index < 0:
+            index += length
+        if not (0 <= index <= length):
+            raise IndexError()
+        path = self.path
+        while path:
+            node, offset = path[-1]
+            if offset <= index < offset + node.length:
+                path.pop()
+                self._descend(node, offset, index)
+                return
+            path.pop()
+        self._descend(self.tree.root, 0, index)
+
+    def set(self, value: X) -> None:
+        """今の位置の値を value に置き換え、経路上の acc を直す。 O(log n)"""
+        self._check()
+        path = self.path
+        if not path:
+            raise IndexError()
+        tree = self.tree
+        path[-1][0].value = value
+        for node, _ in reversed(path):
+            tree._propagate(node)
+        tree.version += 1
+        self.version = tree.version
+
+
+class SortedRBST(RBST[X, M]):
+    """値の昇順に並べておく RBST 。重複を許す順序付き多重集合として使う。
+
+    位置での挿入 (insert, append, extend) や update で順序を崩さないこと。
+    区間を表す lo, hi は値の半開区間 [lo, hi) 。"""
+
+    def __init__(self, monoid: Monoid, random_generagor: Optional[Random] = None, values: Iterable[X] = ()) -> None:
+        super().__init__(monoid, random_generagor, sorted(values))  # type: ignore
+
+    def add(self, value: X) -> None:
+        self.insert(self.bisect_right(value), value)
+
+    def discard(self, value: X) -> None:
+        index = self.bisect_left(value)
+        if index < len(self) and self[index] == value:
+            del self[index]
+
+    def remove(self, value: X) -> None:
+        index = self.bisect_left(value)
+        if index < len(self) and self[index] == value:
+            del self[index]
+        else:
+            raise ValueError(value)
+
+    def __contains__(self, value: object) -> bool:
+        index = self.bisect_left(value)  # type: ignore
+        return index < len(self) and self[index] == value
+
+    def count(self, lo: X, hi: Optional[X] = None) -> int:  # type: ignore
+        """hi を省くと lo と等しい値の数、渡すと [lo, hi) にある値の数"""
+        if hi is None:
+            return self.bisect_right(lo) - self.bisect_left(lo)
+        return max(self.bisect_left(hi) - self.bisect_left(lo), 0)
+
+    def index(self, value: X, start: int = 0, stop: Optional[int] = None) -> int:  # type: ignore
+        index = self.bisect_left(value)
+        if stop is None:
+            stop = len(self)
+        if index < start:
+            index = start
+        if index < stop and index < len(self) and self[index] == value:
+            return index
+        raise ValueError(value)
+
+    def kth(self, k: int) -> X:
+        return self[k]
+
+    def range_fold(self, lo: X, hi: X) -> X:
+        return self._fold(self.bisect_left(lo), self.bisect_left(hi))
+
+    def irange(self, lo: X, hi: X) -> Iterator[X]:
+        return self.iter_range(self.bisect_left(lo), self.bisect_left(hi))
+
+    def _split_key(self, node: Optional[Node[X, M]], value: X,
+                   right: bool = False) -> Tuple[Optional[Node[X, M]], Optional[Node[X, M]]]:
+        return self._split(node, self._bisect(node, value, right))
+
+    def _detach(self, node: Node[X, M]) -> Tuple[Optional[Node[X, M]], Node[X, M], Optional[Node[X, M]]]:
+        self._eval(node)
+        left, right = node.left, node.right
+        node.left = node.right = None
+        self._pull(node, None)
+        return left, node, right
+
+    def _union(self, a: Optional[Node[X, M]], b: Optional[Node[X, M]]) -> Optional[Node[X, M]]:
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if a.length < b.length:
+            a, b = b, a
+        la, pivot, ra = self._detach(a)
+        bl, br = self._split_key(b, pivot.value)
+        br = self._split_key(br, pivot.value, True)[1]
+        merge = self._merge
+        return merge(merge(self._union(la, bl), pivot), self._union(ra, br))
+
+    def _eval_shared(self, node: Node[X, M]) -> Node[X, M]:
+        """node を書き換えずに、評価済みの複製を返す。遅延評価を押し下げる子も複製する"""
+        node = self._copy_node(node)
+        if node.rev or node.lazy != self.monoid.em():
+            if node.left is not None:
+                node.left = self._copy_node(node.left)
+            if node.right is not None:
+                node.right = self._copy_node(node.right)
+            self._eval(node)
+        return node
+
+    def _split_key_shared(self, node: Optional[Node[X, M]], value: X,
+                          right: bool = False) -> Tuple[Optional[Node[X, M]], Optional[Node[X, M]]]:
+        """_split_key と同じだが node 以下を書き換えない。
+
+        降りる経路の節点と、評価の要る兄弟だけを複製する (経路複製) 。 O(log n)"""
+        path: List[Tuple[Node[X, M], bool]] = []
+        em = self.monoid.em()
+        eval_shared = self._eval_shared
+        while node is not None:
+            node = eval_shared(node)
+            if (not value < node.value) if right else node.value < value:  # type: ignore
+                path.append((node, True))
+                node = node.right
+            else:
+                path.append((node, False))
+                node = node.left
+
+        lo: Optional[Node[X, M]] = None
+        hi: Optional[Node[X, M]] = None
+        pull = self._pull
+        for node, to_left in reversed(path):
+            if to_left:
+                node.right = lo
+                other = node.left
+                if other is not None and (other.rev or other.lazy != em):
+                    node.left = eval_shared(other)
+                pull(node, None)
+                lo = node
+            else:
+                node.left = hi
+                other = node.right
+                if other is not None and (other.rev or other.lazy != em):
+                    node.right = eval_shared(other)
+                pull(node, None)
+                hi = node
+        return lo, hi
+
+    def _intersection(self, a: Optional[Node[X, M]], b: Optional[Node[X, M]]) -> Optional[Node[X, M]]:
+        # 結果は a の節点だけで作り、 b は経路複製で分けて書き換えない
+        if a is None or b is None:
+            return None
+        la, pivot, ra = self._detach(a)
+        bl, br = self._split_key_shared(b, pivot.value)
+        be, br = self._split_key_shared(br, pivot.value, True)
+        left = self._intersection(la, bl)
+        right = self._intersection(ra, br)
+        if be is None:
+            return self._merge(left, right)
+        return self._merge(self._merge(left, pivot), right)
+
+    def _difference(self, a: Optional[Node[X, M]], b: Optional[Node[X, M]]) -> Optional[Node[X, M]]:
+        # _intersection と同じく b は書き換えない
+        if a is None or b is None:
+            return a
+        la, pivot, ra = self._detach(a)
+        bl, br = self._split_key_shared(b, pivot.value)
+        be, br = self._split_key_shared(br, pivot.value, True)
+        left = self._difference(la, bl)
+        right = self._difference(ra, br)
+        if be is None:
+            return self._merge(self._merge(left, pivot), right)
+        return self._merge(left, right)
+
+    def _set_op_parallel(self, other: SortedRBST[X, M], op: str, processes: int) -> None:
+        # 値の範囲を processes 個に切り分け、それぞれを別プロセスで処理してから繋ぐ
+        from concurrent.futures import ProcessPoolExecutor
+
+        a = list(self)
+        b = list(other)
+        src = a if len(a) >= len(b) else b
+        bounds = [src[len(src) * i // processes] for i in range(1, processes)] if src else []
+        cuts_a = [0] + [bisect.bisect_left(a, v) for v in bounds] + [len(a)]
+        cuts_b = [0] + [bisect.bisect_left(b, v) for v in bounds] + [len(b)]
+        chunks_a = [a[i:j] for i, j in zip(cuts_a, cuts_a[1:])]
+        chunks_b = [b[i:j] for i, j in zip(cuts_b, cuts_b[1:])]
+        with ProcessPoolExecutor(processes) as executor:
+            results = executor.map(_set_op_chunk, [op] * len(chunks_a), chunks_a, chunks_b)
+            root = None
+            for values in results:
+                root = self._merge(root, self._build(values))
+        self.root = root
+
+    def union_update(self, other: SortedRBST[X, M], processes: Optional[int] = None) -> None:
+        """other の値を加える。 other は変えない。
+
+        結果は other の節点を含むので、 other を丸ごと複製 (O(|other|)) してから
+        大きさ m <= n の二つを O(m log(n / m + 1)) で合わせる。
+        processes を渡すと値の範囲を分けてプロセスプールで処理する。
+        各木の中で値は重複しないものとして扱う。"""
+        if processes:
+            self._set_op_parallel(other, 'union', processes)
+            return
+        self.root = self._union(self.root, other._copy(other.root))
+
+    def intersection_update(self, other: SortedRBST[X, M], processes: Optional[int] = None) -> None:
+        """other にもある値だけを残す。 union_update と同じ前提
+
+        other は複製せず経路複製で分けるので、大きさ m <= n の二つに対して O(m log(n / m + 1)) 。"""
+        if processes:
+            self._set_op_parallel(other, 'intersection', processes)
+            return
+        self.root = self._intersection(self.root, other.root)
+
+    def difference_update(self, other: SortedRBST[X, M], processes: Optional[int] = None) -> None:
+        """other にある値を取り除く。 intersection_update と同じく O(m log(n / m + 1))"""
+        if processes:
+            self._set_op_parallel(other, 'difference', processes)
+            return
+        self.root = self._difference(self.root, other.root)
+
+
+def _set_op_chunk(op: str, a: Sequence[X], b: Sequence[X]) -> List[X]:
+    """昇順で重複のない a, b の和・積・差 (プロセスプールから呼ぶのでモジュール直下に置く)"""
+    result: List[X] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:  # type: ignore
+            if op != 'intersection':
+                result.append(a[i])
+            i += 1
+        elif b[j] < a[i]:  # type: ignore
+            if op == 'union':
+                result.append(b[j])
+            j += 1
+        else:
+            if op != 'difference':
+                result.append(a[i])
+            i += 1
+            j += 1
+    if op != 'intersection':
+        result.extend(a[i:])
+    if op == 'union':
+        result.extend(b[j:])
+    return result
+
+
 accumulate_monoid = Monoid(
     fx=operator.add,  # lambda x1, x2: x1 + x2
     fa=operator.add,  # lambda x, m: x + m
@@ -1,5 +1,10 @@
-from itertools import islice, tee, repeat, starmap
-from typing import Callable, Iterable, Iterator, Generic, Sequence, TypeVar
+import mmap
+import struct
+from array import array
+from functools import reduce
+from itertools import accumulate, islice, tee, repeat, starmap
+from os import PathLike
+from typing import Callable, Iterable, Iterator, Generic, List, Sequence, TypeVar, Union
 
 
 T = TypeVar('T')
@@ -38,6 +43,214 @@ class SparseTable(Generic[T]):
         return len(self.table[0])
 
 
+class MappedSparseTable(Generic[T]):
+    """ファイルに書き出した SparseTable を mmap で読み取り専用に開くもの
+
+    build で一度だけ表を作ってファイルに保存し、各プロセスはそれを開くだけにする。
+    ページは OS のページキャッシュで共有され、開くのは O(1) 。
+    値は array の typecode で表せる数値に限る。バイトオーダーは実行環境のものをそのまま使う。"""
+
+    _header = struct.Struct('<4sc3xQ')
+    _magic = b'SPTB'
+
+    def __init__(self, path: Union[str, PathLike], op: Operator) -> None:
+        self.op: Operator = op
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < self._header.size:
+            self._mmap.close()
+            raise ValueError(f'sparse table file too short: {path!r}')
+        buf = memoryview(self._mmap)
+        magic, typecode, length = self._header.unpack_from(buf)
+        if magic != self._magic:
+            buf.release()
+            self._mmap.close()
+            raise ValueError(f'not a sparse table file: {path!r}')
+        self.typecode: str = typecode.decode('ascii')
+        itemsize = array(self.typecode).itemsize
+        # SparseTable._init_table と同じく (length - 1).bit_length() + 1 段
+        sizes = []
+        size = length
+        k = 1
+        for _ in range((length - 1).bit_length() + 1):
+            sizes.append(size)
+            size = max(size - k, 0)
+            k <<= 1
+        expected = self._header.size + sum(sizes) * itemsize
+        actual = len(self._mmap)
+        if actual != expected:
+            buf.release()
+            self._mmap.close()
+            raise ValueError(f'sparse table file size mismatch: {path!r} {actual} != {expected}')
+        table = []
+        offset = self._header.size
+        for size in sizes:
+            table.append(buf[offset:offset + size * itemsize].cast(self.typecode))
+            offset += size * itemsize
+        buf.release()
+        self.table: Sequence[Sequence[T]] = tuple(table)
+
+    @classmethod
+    def build(cls, path: Union[str, PathLike], values: Iterable[T], op: Operator, typecode: str = 'q') -> None:
+        with open(path, 'wb') as f:
+            values = tuple(values)
+            f.write(cls._header.pack(cls._magic, typecode.encode('ascii'), len(values)))
+            for table in SparseTable._init_table(values, op):
+                array(typecode, table).tofile(f)
+
+    def query(self, left: int, right: int) -> T:
+        length = right - left
+        if length < 0:
+            raise ValueError
+        index = length.bit_length() - 1
+        table = self.table[index]
+        return self.op(table[left], table[right - 2 ** index])
+
+    def __len__(self) -> int:
+        return len(self.table[0])
+
+    def close(self) -> None:
+        for table in self.table:
+            table.release()  # type: ignore
+        self.table = ()
+        self._mmap.close()
+
+    def __enter__(self) -> 'MappedSparseTable[T]':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class DisjointSparseTable(Generic[T]):
+    """Disjoint Sparse Table
+
+    SparseTable と違い区間を重ねないので、冪等でない結合的な演算 (和、積、文字列連結など) も扱える。
+    構築 O(n log n) 、 query は op の呼び出し 1 回。"""
+
+    def __init__(self, values: Iterable[T], op: Operator) -> None:
+        self.op: Operator = op
+        self.table: Sequence[Sequence[T]] = tuple(self._init_table(values, op))
+
+    @staticmethod
+    def _init_table(values: Iterable[T], op: Operator) -> Iterator[Sequence[T]]:
+        temp = tuple(values)
+        length = len(temp)
+        table_size = (length - 1).bit_length()
+
+        def rop(x: T, y: T) -> T:
+            return op(y, x)
+
+        yield temp
+        half = 2
+        for _ in repeat(None, table_size - 1):
+            row: List[T] = []
+            for mid in range(half, length + half, half * 2):
+                # mid より左は [i, mid) の畳み込み、右は [mid, i] の畳み込み
+                row.extend(reversed(tuple(accumulate(reversed(temp[mid - half:mid]), rop))))
+                row.extend(accumulate(temp[mid:mid + half], op))
+            yield tuple(row)
+            half <<= 1
+
+    def query(self, left: int, right: int) -> T:
+        right -= 1
+        if right < left:
+            raise ValueError
+        if left == right:
+            return self.table[0][left]
+        table = self.table[(left ^ right).bit_length() - 1]
+        return self.op(table[left], table[right])
+
+    def __len__(self) -> int:
+        return len(self.table[0])
+
+
+class BlockSparseTable(Generic[T]):
+    """ブロック分割した線形領域の RMQ
+
+    block_size 個ずつのブロックの最小値を SparseTable に載せ、ブロック内はビットマスクで引く
+    (Fischer–Heun 風) 。 op は min, max のように引数のどちらかを返す演算に限る。
+    表はブロック数ぶんしか作らないので、 SparseTable の n log n 個に比べて小さい。"""
+
+    def __init__(self, values: Iterable[T], op: Operator = min, block_size: int = 64) -> None:
+        if not (0 < block_size <= 64):
+            raise ValueError
+        self.op: Operator = op
+        self.block_size = block_size
+        self.values: Sequence[T] = tuple(values)
+        self.masks: Sequence[int] = self._init_masks(self.values, op, block_size)
+        blocks = (self.values[i:i + block_size] for i in range(0, len(self.values), block_size))
+        self.block_table: SparseTable[T] = SparseTable((reduce(op, block) for block in blocks), op)
+
+    @staticmethod
+    def _init_masks(values: Sequence[T], op: Operator, block_size: int) -> Sequence[int]:
+        # masks[i] はブロック先頭から i までの単調スタックに残る位置のビット集合
+        masks = array('Q')
+        for start in range(0, len(values), block_size):
+            stack: List[int] = []
+            mask = 0
+            for k, v in enumerate(values[start:start + block_size]):
+                while stack:
+                    top = values[start + stack[-1]]
+                    if op(top, v) == top:
+                        break
+                    mask ^= 1 << stack.pop()
+                stack.append(k)
+                mask |= 1 << k
+                masks.append(mask)
+        return masks
+
+    def _query_block(self, left: int, right: int) -> T:
+        # 同じブロック内の閉区間 [left, right]
+        mask = self.masks[right] >> (left % self.block_size)
+        return self.values[left + (mask & -mask).bit_length() - 1]
+
+    def query(self, left: int, right: int) -> T:
+        right -= 1
+        if right < left:
+            raise ValueError
+        block_size = self.block_size
+        bl = left // block_size
+        br = right // block_size
+        if bl == br:
+            return self._query_block(left, right)
+        op = self.op
+        v = op(self._query_block(left, bl * block_size + block_size - 1),
+               self._query_block(br * block_size, right))
+        if bl + 1 < br:
+            v = op(v, self.block_table.query(bl + 1, br))
+        return v
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def bench(lengths: Sequence[int] = (10 ** 5, 10 ** 6), queries: int = 10 ** 5) -> None:
+    import tracemalloc
+    from random import Random
+    from time import perf_counter
+
+    r = Random(0)
+    for length in lengths:
+        seq = [r.randrange(1 << 30) for _ in range(length)]
+        ranges = [sorted((r.randrange(length), r.randrange(length))) for _ in range(queries)]
+        ranges = [(L, R + 1) for L, R in ranges]
+        for cls in (SparseTable, BlockSparseTable):
+            tracemalloc.start()
+            t0 = perf_counter()
+            table = cls(seq, min)
+            t1 = perf_counter()
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            query = table.query
+            t2 = perf_counter()
+            for L, R in ranges:
+                query(L, R)
+            t3 = perf_counter()
+            print(f'{cls.__name__} {length=} build={t1 - t0:.3f}s '
+                  f'memory={memory / 2 ** 20:.1f}MiB query={(t3 - t2) / queries * 1e6:.2f}us')
+
+
 def main() -> None:
     from random import randint
     length = 8
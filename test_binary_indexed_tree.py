@@ -0,0 +1,210 @@
+import operator
+import random
+
+import pytest
+
+import binary_indexed_tree
+
+
+@pytest.mark.parametrize('length', (0, 1, 7, 8, 100))
+def test_from_seq(length):
+    r = random.Random(0)
+    seq = [r.randint(-100, 100) for _ in range(length)]
+
+    a = binary_indexed_tree.BinaryIndexedTree(length)
+    for i, v in enumerate(seq, 1):
+        a.add(i, v)
+    b = binary_indexed_tree.BinaryIndexedTree.from_seq(seq)
+    assert a.length == b.length
+    assert a.data == b.data
+    for i in range(length + 1):
+        assert b.query(i) == sum(seq[:i])
+
+
+@pytest.mark.parametrize('mo', (
+    binary_indexed_tree.Monoid(operator.add, int),
+    binary_indexed_tree.Monoid(max, lambda: -1),
+    ))
+@pytest.mark.parametrize('length', (0, 1, 7, 8, 100))
+def test_from_seq_g(mo, length):
+    r = random.Random(0)
+    seq = [r.randint(0, 100) for _ in range(length)]
+
+    a = binary_indexed_tree.BinaryIndexedTreeG(length, mo)
+    for i, v in enumerate(seq, 1):
+        a.update(i, v)
+    b = binary_indexed_tree.BinaryIndexedTreeG.from_seq(iter(seq), mo)
+    assert a.length == b.length
+    assert a.data == b.data
+
+
+@pytest.mark.parametrize('length', (1, 2, 7, 8, 100))
+def test_lower_bound(length):
+    r = random.Random(0)
+    seq = [r.randint(0, 3) for _ in range(length)]
+    a = binary_indexed_tree.BinaryIndexedTree.from_seq(seq)
+
+    total = sum(seq)
+    for value in range(-1, total + 2):
+        expected = next((i for i in range(length + 1) if a.query(i) >= value), length + 1)
+        assert a.lower_bound(value) == expected
+
+
+def test_multiset():
+    r = random.Random(0)
+    size = 50
+    ms = binary_indexed_tree.BinaryIndexedTreeMultiset(size)
+    values = []
+    for _ in range(300):
+        x = r.randrange(size)
+        if values and r.random() < 0.3:
+            x = r.choice(values)
+            values.remove(x)
+            ms.remove(x)
+        else:
+            values.append(x)
+            ms.add(x)
+        values.sort()
+        assert len(ms) == len(values)
+        for k, v in enumerate(values):
+            assert ms.kth(k) == v
+        for y in range(-1, size + 2):
+            assert ms.count_less(y) == sum(1 for v in values if v < y)
+            assert ms.count(y) == values.count(y)
+            assert (y in ms) == (y in values)
+
+    assert ms.kth(-1) == values[-1]
+    with pytest.raises(IndexError):
+        ms.kth(len(values))
+    with pytest.raises(KeyError):
+        ms.remove(size)
+    with pytest.raises(ValueError):
+        ms.add(-1)
+
+
+def test_range_add():
+    r = random.Random(0)
+    length = 40
+    seq = [r.randint(-100, 100) for _ in range(length)]
+    a = binary_indexed_tree.RangeAddBinaryIndexedTree.from_seq(seq)
+    assert len(a) == length
+
+    for _ in range(300):
+        L, R = sorted((r.randrange(length + 1), r.randrange(length + 1)))
+        v = r.randint(-100, 100)
+        kind = r.randrange(4)
+        if kind == 0:
+            a.range_add(L, R, v)
+            for i in range(L, R):
+                seq[i] += v
+        elif kind == 1 and L < length:
+            a.add(L, v)
+            seq[L] += v
+        elif kind == 2 and L < length:
+            a.update(L, v)
+            seq[L] = v
+        assert a.range_sum(L, R) == sum(seq[L:R])
+        assert [a.get(i) for i in range(length)] == seq
+
+
+def test_range_add_empty():
+    a = binary_indexed_tree.RangeAddBinaryIndexedTree(5)
+    a.add(2, 3)
+    assert a.get(2) == 3
+    assert a.range_sum(0, 5) == 3
+    a.range_add(1, 4, 2)
+    assert [a.get(i) for i in range(5)] == [0, 2, 5, 2, 0]
+    assert a.range_sum(0, 5) == 9
+
+
+def test_2d():
+    r = random.Random(0)
+    height, width = 7, 9
+    grid = [[0] * (width + 1) for _ in range(height + 1)]
+    a = binary_indexed_tree.BinaryIndexedTree2D(height, width)
+    for _ in range(100):
+        x = r.randint(1, height)
+        y = r.randint(1, width)
+        v = r.randint(-10, 10)
+        a.add(x, y, v)
+        grid[x][y] += v
+
+    for x1 in range(height + 1):
+        for x2 in range(x1, height + 1):
+            for y1 in range(width + 1):
+                for y2 in range(y1, width + 1):
+                    expected = sum(grid[i][j] for i in range(x1 + 1, x2 + 1) for j in range(y1 + 1, y2 + 1))
+                    assert a.range_sum(x1, y1, x2, y2) == expected
+
+
+def test_2d_compressed():
+    r = random.Random(0)
+    points = [(r.randrange(10 ** 6), r.randrange(10 ** 6)) for _ in range(30)]
+    a = binary_indexed_tree.CompressedBinaryIndexedTree2D(points)
+    weights = {}
+    for _ in range(100):
+        p = r.choice(points)
+        v = r.randint(-10, 10)
+        a.add(*p, v)
+        weights[p] = weights.get(p, 0) + v
+
+    coords = sorted(set(c for p in points for c in p)) + [-1, 10 ** 6]
+    for _ in range(200):
+        x1, x2 = sorted((r.choice(coords), r.choice(coords)))
+        y1, y2 = sorted((r.choice(coords), r.choice(coords)))
+        expected = sum(v for (x, y), v in weights.items() if x1 <= x < x2 and y1 <= y < y2)
+        assert a.range_sum(x1, y1, x2, y2) == expected
+
+    with pytest.raises(KeyError):
+        a.add(-1, -1, 1)
+
+
+@pytest.mark.parametrize('k', (1, 10, 1000))
+def test_many(k):
+    r = random.Random(0)
+    length = 100
+    a = binary_indexed_tree.BinaryIndexedTree.from_seq(r.randint(-9, 9) for _ in range(length))
+    b = binary_indexed_tree.BinaryIndexedTree(length)
+    b.data[:] = a.data
+
+    indices = [r.randint(1, length) for _ in range(k)]
+    values = [r.randint(-9, 9) for _ in range(k)]
+    a.add_many(indices, values)
+    for i, v in zip(indices, values):
+        b.add(i, v)
+    assert a.data == b.data
+
+    indices = [r.randint(-1, length) for _ in range(k)]
+    assert a.query_many(indices) == [b.query(i) for i in indices]
+
+
+def test_sparse():
+    r = random.Random(0)
+    length = 200
+    a = binary_indexed_tree.BinaryIndexedTree(length)
+    b = binary_indexed_tree.SparseBinaryIndexedTree(length)
+    for _ in range(50):
+        i = r.randint(1, length)
+        v = r.randint(0, 5)
+        a.add(i, v)
+        b.add(i, v)
+    assert len(b.data) < length
+    for i in range(length + 1):
+        assert a.query(i) == b.query(i)
+    for value in range(-1, a.query(length) + 2):
+        assert a.lower_bound(value) == b.lower_bound(value)
+
+
+def test_sparse_huge():
+    length = 1 << 40
+    a = binary_indexed_tree.SparseBinaryIndexedTree(length)
+    a.add(1, 1)
+    a.add(1 << 39, 2)
+    a.add(length, 3)
+    assert len(a.data) <= 3 * 41
+    assert a.query(length) == 6
+    assert a.query((1 << 39) - 1) == 1
+    assert a.kth(0) == 1
+    assert a.kth(1) == 1 << 39
+    assert a.kth(3) == length
+    assert a.kth(6) == length + 1
@@ -0,0 +1,154 @@
+import random
+
+import pytest
+
+import chunked_rbst
+
+
+@pytest.fixture
+def mo():
+    return chunked_rbst.accumulate_monoid
+
+
+def test_sequence(mo):
+    t = chunked_rbst.ChunkedRBST(mo, chunk_size=4)
+    assert len(t) == 0
+
+    for i in range(10):
+        t.append(i)
+
+    assert len(t) == 10
+    assert t.index(3) == 3
+    assert list(t) == list(range(10))
+    assert list(reversed(t)) == list(range(10))[::-1]
+
+    t.insert(3, 100)
+    assert t[2] == 2
+    assert t[3] == 100
+    assert t[4] == 3
+    del t[3]
+    assert list(t) == list(range(10))
+    assert list(t[2:8:2]) == [2, 4, 6]
+    assert t.get_acc(slice(None)) == sum(range(10))
+
+    with pytest.raises(ValueError):
+        chunked_rbst.ChunkedRBST(mo, chunk_size=0)
+
+
+@pytest.mark.parametrize('chunk_size', (1, 2, 5, 64))
+@pytest.mark.parametrize('seed', range(5))
+def test_model(mo, chunk_size, seed):
+    r = random.Random(seed)
+    model = list(range(r.randint(0, 50)))
+    t = chunked_rbst.ChunkedRBST(mo, random.Random(seed), model, chunk_size)
+    for _ in range(300):
+        op = r.randrange(6)
+        n = len(model)
+        if op == 0:
+            index = r.randint(-n - 2, n + 2)
+            value = r.randrange(100)
+            t.insert(index, value)
+            model.insert(index, value)
+        elif op == 1 and n:
+            index = r.randrange(-n, n)
+            del t[index]
+            del model[index]
+        elif op == 2:
+            index = slice(r.choice((None, r.randint(-n, n))), r.choice((None, r.randint(-n, n))),
+                          r.choice((None, 1, 2, -1, -3)))
+            del t[index]
+            del model[index]
+        elif op == 3:
+            start, end = sorted((r.randint(0, n), r.randint(0, n)))
+            value = r.randrange(-5, 10)
+            t.update(start, end, value)
+            for i in range(start, end):
+                model[i] += value
+        elif op == 4:
+            values = [r.randrange(100) for _ in range(r.randrange(10))]
+            t.extend(values)
+            model.extend(values)
+        else:
+            start, end = sorted((r.randint(0, n), r.randint(0, n)))
+            assert t.get_acc(slice(start, end)) == sum(model[start:end])
+            assert list(t[start:end]) == model[start:end]
+        assert len(t) == len(model)
+    assert list(t) == model
+    assert list(reversed(t)) == model[::-1]
+    assert [t[i] for i in range(len(t))] == model
+    # 切れ端のチャンクばかりにならない
+    assert t.nodes <= 2 * (len(t) // chunk_size) + 16
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_mintree(seed):
+    r = random.Random(seed)
+    n = 200
+    model = [r.randrange(1000) for _ in range(n)]
+    t = chunked_rbst.ChunkedRBST(chunked_rbst.rmq_monoid, random.Random(seed), model, 8)
+    for _ in range(200):
+        start, end = sorted((r.randint(0, n), r.randint(0, n)))
+        if r.randrange(2):
+            value = r.randrange(1000)
+            t.update(start, end, value)
+            model[start:end] = [value] * (end - start)
+        elif start < end:
+            assert t.get_acc(slice(start, end)) == min(model[start:end])
+    assert list(t) == model
+
+
+def test_chunk_split(mo):
+    t = chunked_rbst.ChunkedRBST(mo, random.Random(0), chunk_size=4)
+    for i in range(100):
+        t.insert(0, i)
+    assert list(t) == list(range(100))[::-1]
+    # 1 要素ずつ足してもチャンクは chunk_size * 2 を超えない
+    assert all(len(node.values) <= 8 for node in t._iter_chunks(t.root))
+    assert t.nodes == sum(1 for _ in t._iter_chunks(t.root))
+
+
+def _depth(node):
+    # 再帰せずに木の高さを測る
+    depth = 0
+    stack = [(node, 1)] if node is not None else []
+    while stack:
+        node, d = stack.pop()
+        depth = max(depth, d)
+        for child in (node.left, node.right):
+            if child is not None:
+                stack.append((child, d + 1))
+    return depth
+
+
+@pytest.mark.parametrize('front', (False, True))
+def test_many_appends_balanced(mo, front):
+    n = 30000
+    t = chunked_rbst.ChunkedRBST(mo, random.Random(0), chunk_size=8)
+    for i in range(n):
+        if front:
+            t.insert(0, n - 1 - i)
+        else:
+            t.append(i)
+    assert len(t) == n
+    # チャンクが溢れるたびに右へ鎖を伸ばすと高さが節点数になる
+    assert _depth(t.root) < 100
+    t.update(10, n - 10, 1)
+    assert t.get_acc(slice(10, n - 10)) == sum(range(10, n - 10)) + n - 20
+    assert t.get_acc(slice(None)) == sum(range(n)) + n - 20
+
+
+@pytest.mark.parametrize('k', (1, 3, 20))
+def test_small_extends(mo, k):
+    chunk_size = 8
+    t = chunked_rbst.ChunkedRBST(mo, random.Random(0), chunk_size=chunk_size)
+    model = []
+    for i in range(0, 20000, k):
+        values = list(range(i, i + k))
+        t.extend(values)
+        model.extend(values)
+    assert list(t) == model
+    assert t.get_acc(slice(None)) == sum(model)
+    # 小さな extend を重ねても 1 要素ずつの節点にならない
+    assert t.nodes == sum(1 for _ in t._iter_chunks(t.root))
+    assert t.nodes <= 2 * (len(t) // chunk_size) + 16
+    assert _depth(t.root) < 100
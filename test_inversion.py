@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+import inversion
+
+
+def naive_inversion_count(seq):
+    return sum(1 for i in range(len(seq)) for j in range(i + 1, len(seq)) if seq[i] > seq[j])
+
+
+@pytest.mark.parametrize('method', ('auto', 'bit', 'merge'))
+@pytest.mark.parametrize('seed', range(5))
+def test_inversion_count(method, seed):
+    r = random.Random(seed)
+    for length in (0, 1, 2, 7, 64, 100):
+        seq = [r.randint(-20, 20) for _ in range(length)]
+        assert inversion.inversion_count(seq, method) == naive_inversion_count(seq)
+        seq = [r.randint(-10 ** 9, 10 ** 9) for _ in range(length)]
+        assert inversion.inversion_count(seq, method) == naive_inversion_count(seq)
+        seq = [r.random() for _ in range(length)]
+        assert inversion.inversion_count(seq, method) == naive_inversion_count(seq)
+
+
+def test_inversion_count_unknown_method():
+    with pytest.raises(ValueError):
+        inversion.inversion_count([1, 0], 'bogo')
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_count_smaller_right(seed):
+    r = random.Random(seed)
+    seq = [r.choice((r.randint(0, 10), r.randint(-10 ** 9, 10 ** 9))) for _ in range(100)]
+    expected = [sum(1 for w in seq[i + 1:] if w < v) for i, v in enumerate(seq)]
+    assert inversion.count_smaller_right(seq) == expected
+    assert inversion.count_smaller_right([]) == []
+
+
+def test_compress():
+    assert inversion.compress([10, -5, 10, 3]) == [2, 0, 2, 1]
+
+
+def test_kendall_tau_distance():
+    assert inversion.kendall_tau_distance('abcde', 'abcde') == 0
+    assert inversion.kendall_tau_distance('abcde', 'edcba') == 10
+    assert inversion.kendall_tau_distance('abcde', 'baced') == 2
+    with pytest.raises(ValueError):
+        inversion.kendall_tau_distance('ab', 'abc')
+    with pytest.raises(ValueError):
+        inversion.kendall_tau_distance('aab', 'aba')
+    with pytest.raises(ValueError):
+        inversion.kendall_tau_distance('aab', 'abc')
+    with pytest.raises(ValueError):
+        inversion.kendall_tau_distance('abd', 'abc')
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+import lca
+
+
+def naive_lca(parents, depth, u, v):
+    while depth[u] > depth[v]:
+        u = parents[u]
+    while depth[v] > depth[u]:
+        v = parents[v]
+    while u != v:
+        u = parents[u]
+        v = parents[v]
+    return u
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_lca(seed):
+    r = random.Random(seed)
+    n = 60
+    parents = [-1] + [r.randrange(i) for i in range(1, n)]
+    tree = lca.LCA.from_parents(parents)
+
+    depth = [0] * n
+    for v in range(1, n):
+        depth[v] = depth[parents[v]] + 1
+    assert tree.depth == depth
+    assert len(tree.tour) == 2 * n - 1
+
+    us = [r.randrange(n) for _ in range(200)]
+    vs = [r.randrange(n) for _ in range(200)]
+    expected = [naive_lca(parents, depth, u, v) for u, v in zip(us, vs)]
+    assert [tree.lca(u, v) for u, v in zip(us, vs)] == expected
+    assert tree.lca_many(us, vs) == expected
+    for u, v, w in zip(us, vs, expected):
+        assert tree.distance(u, v) == depth[u] + depth[v] - 2 * depth[w]
+
+
+def test_lca_adjacency():
+    # 根を 2 にした無向グラフの隣接リスト
+    adjacency = [[1], [0, 2, 3], [1], [1, 4], [3]]
+    tree = lca.LCA(adjacency, 2)
+    assert tree.lca(0, 4) == 1
+    assert tree.lca(4, 3) == 3
+    assert tree.lca(2, 4) == 2
+    assert tree.distance(0, 4) == 3
+
+
+def test_lca_deep_path():
+    n = 20000
+    tree = lca.LCA.from_parents([-1] + list(range(n - 1)))
+    assert tree.lca(n - 1, n // 2) == n // 2
+    assert tree.distance(0, n - 1) == n - 1
+
+
+def test_lca_disconnected():
+    with pytest.raises(ValueError):
+        lca.LCA([[1], [0], []])
+    with pytest.raises(ValueError):
+        lca.LCA.from_parents([-1, 0, -1, 2])
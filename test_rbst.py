@@ -1,3 +1,4 @@
+import collections
 import operator
 import random
 
@@ -135,3 +136,339 @@ def test_mintree_inner():
 
     tree = left.merge(temp)
     assert tree.root.acc == 0
+
+
+@pytest.mark.parametrize('n', (0, 1, 2, 3, 10, 100))
+def test_build(mo, n):
+    t = rbst.RBST(mo, random.Random(0), range(n))
+    assert len(t) == n
+    assert tuple(t) == tuple(range(n))
+    if n:
+        assert t.root.acc == sum(range(n))
+
+        def depth(node):
+            return 0 if node is None else 1 + max(depth(node.left), depth(node.right))
+
+        assert depth(t.root) == n.bit_length()
+
+    t.extend(range(n, 2 * n))
+    assert tuple(t) == tuple(range(2 * n))
+    assert t.get_acc(slice(1, 2 * n - 1)) == sum(range(1, 2 * n - 1))
+
+
+class ZeroRandom(random.Random):
+    """_merge で常に左が根になり、 append で木が一本の鎖になる"""
+
+    def random(self):
+        return 0.0
+
+
+def test_degenerate(mo):
+    n = 2000
+    t = rbst.RBST(mo, ZeroRandom())
+    for i in range(n):
+        t.append(i)
+    assert len(t) == n
+    assert t.get_acc(slice(10, n - 10)) == sum(range(10, n - 10))
+    t.update(0, n, 1)
+    t.insert(n // 2, -1)
+    assert t[n // 2] == -1
+    del t[n // 2]
+    assert t[n - 1] == n
+    left, right = t.split(n // 3)
+    assert len(left) == n // 3
+    assert len(left.merge(right)) == n
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_slicing_model(mo, seed):
+    r = random.Random(seed)
+    n = 40
+    model = list(range(n))
+    t = rbst.RBST(mo, random.Random(seed), model)
+    t.update(5, 30, 100)
+    for i in range(5, 30):
+        model[i] += 100
+
+    for _ in range(50):
+        start = r.choice((None, r.randint(-n - 2, n + 2)))
+        stop = r.choice((None, r.randint(-n - 2, n + 2)))
+        step = r.choice((None, 1, 2, 3, -1, -2, -5))
+        index = slice(start, stop, step)
+        sub = t[index]
+        assert len(sub) == len(model[index])
+        assert [sub[i] for i in range(len(sub))] == model[index]
+        if len(sub):
+            assert sub.get_acc(slice(None)) == sum(model[index])
+        # 切り出した木を変えても元の木は変わらない
+        sub.update(0, len(sub), 1)
+        assert [t[i] for i in range(n)] == model
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_delitem_model(mo, seed):
+    r = random.Random(seed)
+    for _ in range(30):
+        n = r.randint(0, 30)
+        model = list(range(n))
+        t = rbst.RBST(mo, random.Random(seed), model)
+        if n:
+            t.update(0, n, 7)
+        model = [v + 7 for v in model]
+        index = slice(r.choice((None, r.randint(-n, n))), r.choice((None, r.randint(-n, n))),
+                      r.choice((None, 1, 2, 3, -1, -3)))
+        del t[index]
+        del model[index]
+        assert len(t) == len(model)
+        assert [t[i] for i in range(len(t))] == model
+        assert t.get_acc(slice(None)) == sum(model)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_iter_lazy(mo, seed):
+    r = random.Random(seed)
+    n = 50
+    model = list(range(n))
+    t = rbst.RBST(mo, random.Random(seed), model)
+    for _ in range(10):
+        L, R = sorted(r.sample(range(n + 1), 2))
+        t.update(L, R, 10)
+        for i in range(L, R):
+            model[i] += 10
+        assert list(t) == model
+        assert list(reversed(t)) == model[::-1]
+
+    for _ in range(50):
+        start = r.randint(-n - 2, n + 2)
+        stop = r.randint(-n - 2, n + 2)
+        assert list(t.iter_range(start, stop)) == model[start:stop]
+    assert list(t.iter_range(0, n)) == model
+    assert list(rbst.RBST(mo).iter_range(0, 10)) == []
+
+
+def test_iter_deep(mo):
+    # 再帰しないので深い木でも走査できる
+    n = 2000
+    t = rbst.RBST(mo, ZeroRandom())
+    for i in range(n):
+        t.append(i)
+    assert list(t) == list(range(n))
+    assert list(reversed(t)) == list(range(n - 1, -1, -1))
+    assert list(t.iter_range(n - 5, n)) == list(range(n - 5, n))
+
+
+def _snapshot(node):
+    if node is None:
+        return None
+    return (id(node), node.value, node.acc, node.lazy, _snapshot(node.left), _snapshot(node.right))
+
+
+@pytest.mark.parametrize('monoid', (rbst.accumulate_monoid, rbst.rmq_monoid))
+@pytest.mark.parametrize('seed', range(5))
+def test_fold_readonly(monoid, seed):
+    r = random.Random(seed)
+    n = 40
+    fold = sum if monoid is rbst.accumulate_monoid else min
+    model = [r.randint(0, 1000) for _ in range(n)]
+    t = rbst.RBST(monoid, random.Random(seed), model)
+    for _ in range(5):
+        L, R = sorted(r.sample(range(n + 1), 2))
+        v = r.randint(0, 1000)
+        t.update(L, R, v)
+        for i in range(L, R):
+            model[i] = model[i] + v if monoid is rbst.accumulate_monoid else v
+
+    before = _snapshot(t.root)
+    ranges = []
+    for L in range(n + 1):
+        for R in range(L, n + 1):
+            expected = fold(model[L:R]) if L < R else monoid.ex()
+            assert t.get_acc(slice(L, R)) == expected
+            ranges.append((L, R))
+    assert _snapshot(t.root) == before
+
+    r.shuffle(ranges)
+    expected = [t.get_acc(slice(L, R)) for L, R in ranges]
+    assert t.get_acc_many(ranges) == expected
+    assert _snapshot(t.root) == before
+    assert t.get_acc_many([]) == []
+    assert rbst.RBST(monoid).get_acc_many([(0, 3)]) == [monoid.ex()]
+
+
+concat_monoid = rbst.Monoid(
+    fx=operator.add,
+    fa=lambda x, m: x,
+    fm=lambda m1, m2: m1,
+    fp=lambda m, length: m,
+    ex=str,
+    em=int,
+    )
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_reverse_rotate(seed):
+    r = random.Random(seed)
+    n = 30
+    model = [chr(ord('a') + i % 26) + str(i) for i in range(n)]
+    t = rbst.RBST(concat_monoid, random.Random(seed), model)
+    for _ in range(100):
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        if r.random() < 0.5:
+            t.reverse(L, R)
+            model[L:R] = model[L:R][::-1]
+        else:
+            k = r.randint(-40, 40)
+            t.rotate(L, R, k)
+            d = collections.deque(model[L:R])
+            d.rotate(k)
+            model[L:R] = d
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        assert t.get_acc(slice(L, R)) == ''.join(model[L:R])
+    assert list(t) == model
+    ranges = [(L, R) for L in range(n + 1) for R in range(L, n + 1)]
+    assert t.get_acc_many(ranges) == [''.join(model[L:R]) for L, R in ranges]
+    assert list(reversed(t)) == model[::-1]
+    assert list(t.iter_range(3, 20)) == model[3:20]
+    assert list(t[2:25]) == model[2:25]
+    assert list(t[::-3]) == model[::-3]
+    assert [t[i] for i in range(n)] == model
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_reverse_with_update(mo, seed):
+    r = random.Random(seed)
+    n = 30
+    model = list(range(n))
+    t = rbst.RBST(mo, random.Random(seed), model)
+    for _ in range(100):
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        if r.random() < 0.5:
+            t.reverse(L, R)
+            model[L:R] = model[L:R][::-1]
+        elif L < R:
+            t.update(L, R, 5)
+            for i in range(L, R):
+                model[i] += 5
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        assert t.get_acc(slice(L, R)) == sum(model[L:R])
+    assert list(t) == model
+    t.reverse()
+    assert list(t) == model[::-1]
+
+
+@pytest.mark.parametrize('op', ('union', 'intersection', 'difference'))
+@pytest.mark.parametrize('seed', range(10))
+def test_set_ops(mo, op, seed):
+    r = random.Random(seed)
+    a = set(r.sample(range(200), r.randint(0, 80)))
+    b = set(r.sample(range(200), r.randint(0, 80)))
+    ta = rbst.SortedRBST(mo, random.Random(seed), a)
+    tb = rbst.SortedRBST(mo, random.Random(seed + 100), b)
+    getattr(ta, op + '_update')(tb)
+    expected = sorted(getattr(a, op)(b))
+    assert list(ta) == expected
+    assert len(ta) == len(expected)
+    assert ta.get_acc(slice(None)) == sum(expected)
+    assert list(tb) == sorted(b)
+    ta.add(1000)
+    assert list(ta) == expected + [1000]
+
+
+@pytest.mark.parametrize('op', ('union', 'intersection', 'difference'))
+def test_set_ops_processes(mo, op):
+    r = random.Random(0)
+    a = set(r.sample(range(500), 200))
+    b = set(r.sample(range(500), 200))
+    ta = rbst.SortedRBST(mo, random.Random(0), a)
+    tb = rbst.SortedRBST(mo, random.Random(1), b)
+    getattr(ta, op + '_update')(tb, processes=2)
+    assert list(ta) == sorted(getattr(a, op)(b))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_cursor(mo, seed):
+    r = random.Random(seed)
+    n = 60
+    model = list(range(n))
+    t = rbst.RBST(mo, random.Random(seed), model)
+    t.update(10, 40, 100)
+    t.reverse(5, 50)
+    model[10:40] = [v + 100 for v in model[10:40]]
+    model[5:50] = model[5:50][::-1]
+
+    c = t.cursor()
+    values = []
+    while c.index < n:
+        values.append(c.value)
+        c.next()
+    assert values == model
+    with pytest.raises(IndexError):
+        c.next()
+    for i in reversed(range(n)):
+        c.prev()
+        assert c.value == model[i]
+    with pytest.raises(IndexError):
+        c.prev()
+
+    for _ in range(100):
+        i = r.randint(0, n)
+        c.seek(i)
+        assert c.index == i
+        if i < n:
+            assert c.value == model[i]
+            value = r.randrange(1000)
+            c.set(value)
+            model[i] = value
+            assert t.get_acc(slice(None)) == sum(model)
+    assert list(t) == model
+
+
+def test_cursor_invalidated(mo):
+    t = rbst.RBST(mo, random.Random(0), range(10))
+    c = t.cursor(3)
+    del t[0]
+    with pytest.raises(rbst.RBSTError):
+        c.value
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_insert_many_pop_range(mo, seed):
+    r = random.Random(seed)
+    model = list(range(20))
+    t = rbst.RBST(mo, random.Random(seed), model)
+    for _ in range(50):
+        n = len(model)
+        if r.randrange(2):
+            index = r.randint(-n - 2, n + 2)
+            values = [r.randrange(100) for _ in range(r.randrange(10))]
+            t.insert_many(index, values)
+            model[index:index] = values
+        else:
+            start, end = r.randint(-n - 2, n + 2), r.randint(-n - 2, n + 2)
+            popped = t.pop_range(start, end)
+            assert list(popped) == model[start:end]
+            assert popped.get_acc(slice(None)) == sum(model[start:end])
+            del model[start:end]
+        assert list(t) == model
+        assert t.get_acc(slice(None)) == sum(model)
+
+
+@pytest.mark.parametrize('op', ('intersection', 'difference'))
+@pytest.mark.parametrize('seed', range(5))
+def test_set_ops_other_unchanged(mo, op, seed):
+    r = random.Random(seed)
+    a = set(r.sample(range(300), 30))
+    b = set(r.sample(range(300), 150))
+    ta = rbst.SortedRBST(mo, random.Random(seed), a)
+    tb = rbst.SortedRBST(mo, random.Random(seed + 100), (v - 1000 for v in b))
+    # 遅延評価が残ったままの other を分けても壊さない
+    tb.update(0, len(tb), 1000)
+    tb.update(0, len(tb) // 2, 0)
+    getattr(ta, op + '_update')(tb)
+    expected = sorted(getattr(a, op)(b))
+    assert list(ta) == expected
+    assert ta.get_acc(slice(None)) == sum(expected)
+    assert list(tb) == sorted(b)
+    assert tb.get_acc(slice(None)) == sum(b)
+    # 結果は other と節点を共有しない
+    assert not {id(node) for node in ta._iter_nodes(ta.root)} & {id(node) for node in tb._iter_nodes(tb.root)}
@@ -19,4 +19,100 @@ def test_sparsetable(op):
         for R in range(L + 1, len(seq)):
             x = functools.reduce(op, seq[L:R])
             y = sparse_table.query(L, R)
-            assert x == y
\ No newline at end of file
+            assert x == y
+
+
+@pytest.mark.parametrize('op', (max, min, operator.add, operator.mul, operator.xor, math.gcd))
+@pytest.mark.parametrize('length', (1, 2, 3, 8, 9, 100))
+def test_disjoint_sparsetable(op, length):
+    r = random.Random()
+    r.seed(0)
+    seq = [r.randint(1, 127) for _ in range(length)]
+    sparse_table = sparsetable.DisjointSparseTable(seq, op)
+    assert len(sparse_table) == length
+
+    for L in range(len(seq)):
+        for R in range(L + 1, len(seq) + 1):
+            x = functools.reduce(op, seq[L:R])
+            y = sparse_table.query(L, R)
+            assert x == y
+
+
+def test_disjoint_sparsetable_noncommutative():
+    r = random.Random()
+    r.seed(0)
+    seq = [chr(r.randint(ord('a'), ord('z'))) for _ in range(50)]
+    sparse_table = sparsetable.DisjointSparseTable(seq, operator.add)
+
+    for L in range(len(seq)):
+        for R in range(L + 1, len(seq) + 1):
+            assert sparse_table.query(L, R) == ''.join(seq[L:R])
+
+    with pytest.raises(ValueError):
+        sparse_table.query(3, 3)
+
+
+@pytest.mark.parametrize('op', (max, min))
+@pytest.mark.parametrize('block_size', (1, 3, 4, 64))
+@pytest.mark.parametrize('length', (1, 5, 17, 100))
+def test_block_sparsetable(op, block_size, length):
+    r = random.Random()
+    r.seed(0)
+    seq = [r.randint(0, 31) for _ in range(length)]
+    sparse_table = sparsetable.BlockSparseTable(seq, op, block_size)
+    assert len(sparse_table) == length
+
+    for L in range(len(seq)):
+        for R in range(L + 1, len(seq) + 1):
+            x = functools.reduce(op, seq[L:R])
+            y = sparse_table.query(L, R)
+            assert x == y
+
+
+@pytest.mark.parametrize('length', (1, 2, 7, 8, 9, 100))
+@pytest.mark.parametrize('op', (max, min))
+def test_mapped_sparsetable(tmp_path, op, length):
+    r = random.Random()
+    r.seed(0)
+    seq = [r.randint(-128, 127) for _ in range(length)]
+    path = tmp_path / 'table.bin'
+    sparsetable.MappedSparseTable.build(path, seq, op)
+
+    with sparsetable.MappedSparseTable(path, op) as sparse_table:
+        assert len(sparse_table) == length
+        assert tuple(map(tuple, sparse_table.table)) == sparsetable.SparseTable(seq, op).table
+        for L in range(len(seq)):
+            for R in range(L + 1, len(seq) + 1):
+                x = functools.reduce(op, seq[L:R])
+                y = sparse_table.query(L, R)
+                assert x == y
+
+
+def test_mapped_sparsetable_bad_file(tmp_path):
+    path = tmp_path / 'table.bin'
+    path.write_bytes(b'\0' * 32)
+    with pytest.raises(ValueError):
+        sparsetable.MappedSparseTable(path, max)
+
+
+@pytest.mark.parametrize('cut', (1, 8, 100))
+def test_mapped_sparsetable_truncated(tmp_path, cut):
+    path = tmp_path / 'table.bin'
+    sparsetable.MappedSparseTable.build(path, range(100), max)
+    data = path.read_bytes()
+    path.write_bytes(data[:-cut])
+    with pytest.raises(ValueError):
+        sparsetable.MappedSparseTable(path, max)
+    path.write_bytes(data + b'\0' * 8)
+    with pytest.raises(ValueError):
+        sparsetable.MappedSparseTable(path, max)
+
+
+@pytest.mark.parametrize('keep', (0, 4, 15))
+def test_mapped_sparsetable_truncated_header(tmp_path, keep):
+    # ヘッダ (16 バイト) の途中で切れたファイル
+    path = tmp_path / 'table.bin'
+    sparsetable.MappedSparseTable.build(path, range(100), max)
+    path.write_bytes(path.read_bytes()[:keep])
+    with pytest.raises(ValueError):
+        sparsetable.MappedSparseTable(path, max)
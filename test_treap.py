@@ -1,3 +1,6 @@
+import bisect
+import collections
+import operator
 import random
 
 import pytest
@@ -248,5 +251,547 @@ def test_bisect():
     for i, n in enumerate(nums):
         assert tree[i] == n
 
-    # assert tree.bisect_left(5) == 3
-    # assert tree.bisect_right(5) == 6
+    assert tree.bisect_left(5) == 3
+    assert tree.bisect_right(5) == 6
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_build(mo, seed):
+    a = treap.Treap(mo, random.Random(seed))
+    for i in range(50):
+        a.append(i)
+    b = treap.Treap(mo, random.Random(seed), range(50))
+
+    def shape(node):
+        if node is None:
+            return None
+        return (node.value, node.acc, node.length, shape(node.left), shape(node.right))
+
+    assert shape(a.root) == shape(b.root)
+
+    b.extend(range(50, 100))
+    assert tuple(b) == tuple(range(100))
+    assert b.get_acc(slice(10, 90)) == sum(range(10, 90))
+    assert len(treap.Treap(mo, values=())) == 0
+
+
+class IncreasingRandom(random.Random):
+    """優先度が単調増加になり、 append で木が一本の鎖になる"""
+
+    def __init__(self):
+        super().__init__(0)
+        self.count = 0
+
+    def random(self):
+        self.count += 1
+        return self.count
+
+
+def test_degenerate(mo):
+    n = 2000
+    t = treap.Treap(mo, IncreasingRandom())
+    for i in range(n):
+        t.append(i)
+    assert len(t) == n
+    assert t.get_acc(slice(10, n - 10)) == sum(range(10, n - 10))
+    t.update(0, n, 1)
+    t.insert(n // 2, -1)
+    assert t[n // 2] == -1
+    del t[n // 2]
+    assert t[n - 1] == n
+    left, right = t.split(n // 3)
+    assert len(left) == n // 3
+    assert len(left.merge(right)) == n
+
+
+def test_node_slots():
+    node = treap.Node(1, 0, 0.5)
+    assert not hasattr(node, '__dict__')
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pooled(mo, seed):
+    a = treap.Treap(mo, random.Random(seed), range(30))
+    b = treap.PooledTreap(mo, random.Random(seed), range(30))
+    r = random.Random(seed)
+    for _ in range(200):
+        n = len(a)
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        kind = r.randrange(5)
+        if kind == 0:
+            a.insert(L, L)
+            b.insert(L, L)
+        elif kind == 1 and L < n:
+            del a[L]
+            del b[L]
+        elif kind == 2 and L < R:
+            a.update(L, R, 3)
+            b.update(L, R, 3)
+        elif kind == 3:
+            a.append(R)
+            b.append(R)
+        assert a.get_acc(slice(L, R)) == b.get_acc(slice(L, R))
+        assert len(a) == len(b)
+        assert list(a) == list(b)
+
+    assert tuple(b[1:10:3]) == tuple(a[1:10:3])
+    del a[2:8]
+    del b[2:8]
+    del a[::2]
+    del b[::2]
+    assert list(a) == list(b)
+    del a[::-3]
+    del b[::-3]
+    assert list(a) == list(b)
+
+
+def test_pool_reuse(mo):
+    t = treap.PooledTreap(mo, random.Random(0), range(10))
+    size = len(t.pool.value)
+    del t[3:6]
+    assert len(t.pool.free) == 3
+    t.extend([100, 101, 102])
+    assert len(t.pool.value) == size
+    assert not t.pool.free
+    assert tuple(t) == (0, 1, 2, 6, 7, 8, 9, 100, 101, 102)
+
+
+def test_pool_delitem_negative_step(mo):
+    t = treap.PooledTreap(mo, random.Random(0), range(5))
+    size = len(t.pool.value)
+    del t[4:1:-1]
+    assert tuple(t) == (0, 1)
+    assert len(t.pool.value) - len(t.pool.free) - 1 == 2
+    t.extend([5, 6, 7])
+    assert len(t.pool.value) == size
+    assert tuple(t) == (0, 1, 5, 6, 7)
+
+
+def test_pool_slice_no_leak(mo):
+    t = treap.PooledTreap(mo, random.Random(0), range(100))
+    size = len(t.pool.value)
+    for _ in range(1000):
+        s = t[10:20]
+        assert tuple(s) == tuple(range(10, 20))
+    # 捨てた切り出しが親の NodePool に残らない
+    assert len(t.pool.value) == size
+    assert s.pool is not t.pool
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_slicing_model(mo, seed):
+    r = random.Random(seed)
+    n = 40
+    model = list(range(n))
+    t = treap.Treap(mo, random.Random(seed), model)
+    t.update(5, 30, 100)
+    for i in range(5, 30):
+        model[i] += 100
+
+    for _ in range(50):
+        start = r.choice((None, r.randint(-n - 2, n + 2)))
+        stop = r.choice((None, r.randint(-n - 2, n + 2)))
+        step = r.choice((None, 1, 2, 3, -1, -2, -5))
+        index = slice(start, stop, step)
+        sub = t[index]
+        assert len(sub) == len(model[index])
+        assert [sub[i] for i in range(len(sub))] == model[index]
+        if len(sub):
+            assert sub.get_acc(slice(None)) == sum(model[index])
+        # 切り出した木を変えても元の木は変わらない
+        sub.update(0, len(sub), 1)
+        assert [t[i] for i in range(n)] == model
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_delitem_model(mo, seed):
+    r = random.Random(seed)
+    for _ in range(30):
+        n = r.randint(0, 30)
+        model = list(range(n))
+        t = treap.Treap(mo, random.Random(seed), model)
+        if n:
+            t.update(0, n, 7)
+        model = [v + 7 for v in model]
+        index = slice(r.choice((None, r.randint(-n, n))), r.choice((None, r.randint(-n, n))),
+                      r.choice((None, 1, 2, 3, -1, -3)))
+        del t[index]
+        del model[index]
+        assert len(t) == len(model)
+        assert [t[i] for i in range(len(t))] == model
+        assert t.get_acc(slice(None)) == sum(model)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_iter_lazy(mo, seed):
+    r = random.Random(seed)
+    n = 50
+    model = list(range(n))
+    t = treap.Treap(mo, random.Random(seed), model)
+    for _ in range(10):
+        L, R = sorted(r.sample(range(n + 1), 2))
+        t.update(L, R, 10)
+        for i in range(L, R):
+            model[i] += 10
+        assert list(t) == model
+        assert list(reversed(t)) == model[::-1]
+
+    for _ in range(50):
+        start = r.randint(-n - 2, n + 2)
+        stop = r.randint(-n - 2, n + 2)
+        assert list(t.iter_range(start, stop)) == model[start:stop]
+    assert list(t.iter_range(0, n)) == model
+    assert list(treap.Treap(mo).iter_range(0, 10)) == []
+
+
+def test_iter_deep(mo):
+    # 再帰しないので深い木でも走査できる
+    n = 2000
+    t = treap.Treap(mo, IncreasingRandom())
+    for i in range(n):
+        t.append(i)
+    assert list(t) == list(range(n))
+    assert list(reversed(t)) == list(range(n - 1, -1, -1))
+    assert list(t.iter_range(n - 5, n)) == list(range(n - 5, n))
+
+
+def _snapshot(node):
+    if node is None:
+        return None
+    return (id(node), node.value, node.acc, node.lazy, _snapshot(node.left), _snapshot(node.right))
+
+
+@pytest.mark.parametrize('monoid', (treap.accumulate_monoid, treap.rmq_monoid))
+@pytest.mark.parametrize('seed', range(5))
+def test_fold_readonly(monoid, seed):
+    r = random.Random(seed)
+    n = 40
+    fold = sum if monoid is treap.accumulate_monoid else min
+    model = [r.randint(0, 1000) for _ in range(n)]
+    t = treap.Treap(monoid, random.Random(seed), model)
+    for _ in range(5):
+        L, R = sorted(r.sample(range(n + 1), 2))
+        v = r.randint(0, 1000)
+        t.update(L, R, v)
+        for i in range(L, R):
+            model[i] = model[i] + v if monoid is treap.accumulate_monoid else v
+
+    before = _snapshot(t.root)
+    ranges = []
+    for L in range(n + 1):
+        for R in range(L, n + 1):
+            expected = fold(model[L:R]) if L < R else monoid.ex()
+            assert t.get_acc(slice(L, R)) == expected
+            ranges.append((L, R))
+    assert _snapshot(t.root) == before
+
+    r.shuffle(ranges)
+    expected = [t.get_acc(slice(L, R)) for L, R in ranges]
+    assert t.get_acc_many(ranges) == expected
+    assert _snapshot(t.root) == before
+    assert t.get_acc_many([]) == []
+    assert treap.Treap(monoid).get_acc_many([(0, 3)]) == [monoid.ex()]
+
+
+concat_monoid = treap.Monoid(
+    fx=operator.add,
+    fa=lambda x, m: x,
+    fm=lambda m1, m2: m1,
+    fp=lambda m, length: m,
+    ex=str,
+    em=int,
+    )
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_reverse_rotate(seed):
+    r = random.Random(seed)
+    n = 30
+    model = [chr(ord('a') + i % 26) + str(i) for i in range(n)]
+    t = treap.Treap(concat_monoid, random.Random(seed), model)
+    for _ in range(100):
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        if r.random() < 0.5:
+            t.reverse(L, R)
+            model[L:R] = model[L:R][::-1]
+        else:
+            k = r.randint(-40, 40)
+            t.rotate(L, R, k)
+            d = collections.deque(model[L:R])
+            d.rotate(k)
+            model[L:R] = d
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        assert t.get_acc(slice(L, R)) == ''.join(model[L:R])
+    assert list(t) == model
+    ranges = [(L, R) for L in range(n + 1) for R in range(L, n + 1)]
+    assert t.get_acc_many(ranges) == [''.join(model[L:R]) for L, R in ranges]
+    assert list(reversed(t)) == model[::-1]
+    assert list(t.iter_range(3, 20)) == model[3:20]
+    assert list(t[2:25]) == model[2:25]
+    assert list(t[::-3]) == model[::-3]
+    assert [t[i] for i in range(n)] == model
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_reverse_with_update(mo, seed):
+    r = random.Random(seed)
+    n = 30
+    model = list(range(n))
+    t = treap.Treap(mo, random.Random(seed), model)
+    for _ in range(100):
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        if r.random() < 0.5:
+            t.reverse(L, R)
+            model[L:R] = model[L:R][::-1]
+        elif L < R:
+            t.update(L, R, 5)
+            for i in range(L, R):
+                model[i] += 5
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        assert t.get_acc(slice(L, R)) == sum(model[L:R])
+    assert list(t) == model
+    t.reverse()
+    assert list(t) == model[::-1]
+
+
+def _nodes(node):
+    stack = [node] if node else []
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(child for child in (node.left, node.right) if child is not None)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_persistent(mo, seed):
+    r = random.Random(seed)
+    n = 40
+    model = list(range(n))
+    t = treap.PersistentTreap(mo, random.Random(seed), model)
+    versions = [(t.snapshot(), list(model))]
+    for _ in range(60):
+        L, R = sorted((r.randint(0, n), r.randint(0, n)))
+        kind = r.randrange(5)
+        if kind == 0 and L < R:
+            t.update(L, R, 3)
+            for i in range(L, R):
+                model[i] += 3
+        elif kind == 1:
+            t.reverse(L, R)
+            model[L:R] = model[L:R][::-1]
+        elif kind == 2:
+            t.insert(L, -L)
+            model.insert(L, -L)
+            n += 1
+        elif kind == 3 and L < n:
+            del t[L]
+            del model[L]
+            n -= 1
+        else:
+            t.rotate(L, R, 2)
+            model[L:R] = model[L:R][-2:] + model[L:R][:-2] if R - L >= 2 else model[L:R]
+        versions.append((t.snapshot(), list(model)))
+
+    for version, expected in versions:
+        assert version.get_acc(slice(None)) == sum(expected)
+        assert [version[i] for i in range(len(version))] == expected
+        assert list(version) == expected
+
+
+def test_persistent_sharing(mo):
+    n = 1024
+    t = treap.PersistentTreap(mo, random.Random(0), range(n))
+    old = t.snapshot()
+    before = set(map(id, _nodes(old.root)))
+    t.update(100, 900, 1)
+    t.insert(500, -1)
+    after = set(map(id, _nodes(t.root)))
+    # 増えた節点は木の高さの定数倍程度に収まる
+    assert len(after - before) < 200
+    assert list(old) == list(range(n))
+    assert t[500] == -1
+    assert t[100] == 101
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_sorted(mo, seed):
+    r = random.Random(seed)
+    model = sorted(r.randint(0, 30) for _ in range(20))
+    t = treap.SortedTreap(mo, random.Random(seed), reversed(model))
+    assert list(t) == model
+    for _ in range(200):
+        v = r.randint(-2, 32)
+        kind = r.randrange(3)
+        if kind == 0:
+            t.add(v)
+            model.insert(bisect.bisect_right(model, v), v)
+        elif kind == 1:
+            t.discard(v)
+            if v in model:
+                model.remove(v)
+        elif v in model:
+            t.remove(v)
+            model.remove(v)
+        else:
+            with pytest.raises(ValueError):
+                t.remove(v)
+        assert list(t) == model
+
+        lo, hi = r.randint(-2, 32), r.randint(-2, 32)
+        assert t.bisect_left(lo) == bisect.bisect_left(model, lo)
+        assert t.bisect_right(lo) == bisect.bisect_right(model, lo)
+        assert (lo in t) == (lo in model)
+        assert t.count(lo) == model.count(lo)
+        assert t.count(lo, hi) == sum(1 for x in model if lo <= x < hi)
+        assert t.range_fold(lo, hi) == sum(x for x in model if lo <= x < hi)
+        assert list(t.irange(lo, hi)) == [x for x in model if lo <= x < hi]
+        if lo in model:
+            assert t.index(lo) == model.index(lo)
+        else:
+            with pytest.raises(ValueError):
+                t.index(lo)
+        if model:
+            k = r.randrange(len(model))
+            assert t.kth(k) == model[k]
+
+
+@pytest.mark.parametrize('op', ('union', 'intersection', 'difference'))
+@pytest.mark.parametrize('seed', range(10))
+def test_set_ops(mo, op, seed):
+    r = random.Random(seed)
+    a = set(r.sample(range(200), r.randint(0, 80)))
+    b = set(r.sample(range(200), r.randint(0, 80)))
+    ta = treap.SortedTreap(mo, random.Random(seed), a)
+    tb = treap.SortedTreap(mo, random.Random(seed + 100), b)
+    getattr(ta, op + '_update')(tb)
+    expected = sorted(getattr(a, op)(b))
+    assert list(ta) == expected
+    assert len(ta) == len(expected)
+    assert ta.get_acc(slice(None)) == sum(expected)
+    assert list(tb) == sorted(b)
+    ta.add(1000)
+    assert list(ta) == expected + [1000]
+
+
+@pytest.mark.parametrize('op', ('union', 'intersection', 'difference'))
+def test_set_ops_processes(mo, op):
+    r = random.Random(0)
+    a = set(r.sample(range(500), 200))
+    b = set(r.sample(range(500), 200))
+    ta = treap.SortedTreap(mo, random.Random(0), a)
+    tb = treap.SortedTreap(mo, random.Random(1), b)
+    getattr(ta, op + '_update')(tb, processes=2)
+    assert list(ta) == sorted(getattr(a, op)(b))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_cursor(mo, seed):
+    r = random.Random(seed)
+    n = 60
+    model = list(range(n))
+    t = treap.Treap(mo, random.Random(seed), model)
+    t.update(10, 40, 100)
+    t.reverse(5, 50)
+    model[10:40] = [v + 100 for v in model[10:40]]
+    model[5:50] = model[5:50][::-1]
+
+    c = t.cursor()
+    values = []
+    while c.index < n:
+        values.append(c.value)
+        c.next()
+    assert values == model
+    with pytest.raises(IndexError):
+        c.value
+    with pytest.raises(IndexError):
+        c.next()
+    for i in reversed(range(n)):
+        c.prev()
+        assert c.index == i
+        assert c.value == model[i]
+    with pytest.raises(IndexError):
+        c.prev()
+
+    for _ in range(100):
+        i = r.randint(0, n)
+        c.seek(i)
+        assert c.index == i
+        if i < n:
+            assert c.value == model[i]
+            value = r.randrange(1000)
+            c.set(value)
+            model[i] = value
+            assert t.get_acc(slice(None)) == sum(model)
+    assert list(t) == model
+    assert t.cursor(-1).value == model[-1]
+    with pytest.raises(IndexError):
+        t.cursor(n + 1)
+
+
+def test_cursor_invalidated(mo):
+    t = treap.Treap(mo, random.Random(0), range(10))
+    c = t.cursor(3)
+    other = t.cursor(5)
+    c.set(100)
+    with pytest.raises(treap.TreapError):
+        other.value
+    assert c.value == 100
+    t.insert(0, -1)
+    with pytest.raises(treap.TreapError):
+        c.next()
+    with pytest.raises(treap.TreapError):
+        c.seek(0)
+
+
+def test_cursor_persistent(mo):
+    t = treap.PersistentTreap(mo, random.Random(0), range(20))
+    t.update(0, 20, 1)
+    snap = t.snapshot()
+    c = t.cursor(7)
+    c.set(-1)
+    assert t[7] == -1
+    assert list(snap) == list(range(1, 21))
+    assert t.get_acc(slice(None)) == sum(range(1, 21)) - 8 - 1
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_insert_many_pop_range(mo, seed):
+    r = random.Random(seed)
+    model = list(range(20))
+    t = treap.Treap(mo, random.Random(seed), model)
+    for _ in range(50):
+        n = len(model)
+        if r.randrange(2):
+            index = r.randint(-n - 2, n + 2)
+            values = [r.randrange(100) for _ in range(r.randrange(10))]
+            t.insert_many(index, values)
+            model[index:index] = values
+        else:
+            start, end = r.randint(-n - 2, n + 2), r.randint(-n - 2, n + 2)
+            popped = t.pop_range(start, end)
+            assert list(popped) == model[start:end]
+            assert popped.get_acc(slice(None)) == sum(model[start:end])
+            del model[start:end]
+        assert list(t) == model
+        assert t.get_acc(slice(None)) == sum(model)
+
+
+@pytest.mark.parametrize('op', ('intersection', 'difference'))
+@pytest.mark.parametrize('seed', range(5))
+def test_set_ops_other_unchanged(mo, op, seed):
+    r = random.Random(seed)
+    a = set(r.sample(range(300), 30))
+    b = set(r.sample(range(300), 150))
+    ta = treap.SortedTreap(mo, random.Random(seed), a)
+    tb = treap.SortedTreap(mo, random.Random(seed + 100), (v - 1000 for v in b))
+    # 遅延評価が残ったままの other を分けても壊さない
+    tb.update(0, len(tb), 1000)
+    tb.update(0, len(tb) // 2, 0)
+    getattr(ta, op + '_update')(tb)
+    expected = sorted(getattr(a, op)(b))
+    assert list(ta) == expected
+    assert ta.get_acc(slice(None)) == sum(expected)
+    assert list(tb) == sorted(b)
+    assert tb.get_acc(slice(None)) == sum(b)
+    # 結果は other と節点を共有しない
+    assert not {id(node) for node in ta._iter_nodes(ta.root)} & {id(node) for node in tb._iter_nodes(tb.root)}
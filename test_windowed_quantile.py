@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import windowed_quantile
+
+
+def naive(values, window, quantiles):
+    for i in range(window, len(values) + 1):
+        w = sorted(values[i - window:i])
+        yield tuple(w[int(q * (window - 1))] for q in quantiles)
+
+
+@pytest.mark.parametrize('window', (1, 2, 5, 16))
+def test_windowed_quantiles(window):
+    r = random.Random(0)
+    values = [r.randint(0, 30) for _ in range(100)]
+    quantiles = (0.0, 0.5, 0.9, 0.99, 1.0)
+    expected = list(naive(values, window, quantiles))
+    assert list(windowed_quantile.windowed_quantiles(iter(values), window, quantiles)) == expected
+    assert list(windowed_quantile.offline_windowed_quantiles(values, window, quantiles)) == expected
+
+
+def test_windowed_quantiles_unbounded():
+    # 終わりのないジェネレータからも窓が埋まった時点で値を返す
+    r = random.Random(0)
+    values = iter(lambda: r.randint(0, 1000), None)
+    it = windowed_quantile.windowed_quantiles(values, 10, (0.5, 0.99))
+    for _ in range(100):
+        p50, p99 = next(it)
+        assert p50 <= p99
+
+
+def test_bucketed_windowed_quantiles():
+    r = random.Random(0)
+    values = [r.uniform(-5, 105) for _ in range(100)]
+    quantiles = (0.5, 0.99)
+    resolution = 0.25
+    clipped = [min(max(v, 0), 100 - resolution) for v in values]
+    bucketed = [(v // resolution) * resolution for v in clipped]
+    actual = list(windowed_quantile.bucketed_windowed_quantiles(iter(values), 10, 0, 100, resolution, quantiles))
+    assert actual == list(naive(bucketed, 10, quantiles))
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        list(windowed_quantile.windowed_quantiles([1, 2, 3], 0))
+    with pytest.raises(ValueError):
+        list(windowed_quantile.windowed_quantiles([1, 2, 3], 2, (1.5,)))
+    with pytest.raises(ValueError):
+        list(windowed_quantile.offline_windowed_quantiles([1, 2, 3], 0))
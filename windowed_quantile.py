@@ -0,0 +1,111 @@
+"""スライド窓の分位数 (中央値, p99 など)
+
+窓の中身を順序付き多重集合に入れておき、 kth で分位点を引く。
+1 サンプルあたり O(log n) 。
+
+ - windowed_quantiles: 窓を SortedTreap に持つ。値を丸めず、入力を先読みしない。
+ - offline_windowed_quantiles: 値を座標圧縮して BinaryIndexedTreeMultiset に持つ。
+   圧縮のため入力を一度全部読むので、終わりのある列にしか使えない。定数倍は速い。
+ - bucketed_windowed_quantiles: lo から resolution 刻みのバケツに丸めて BinaryIndexedTreeMultiset に持つ。
+   入力を先読みしないので、終わりのないストリームにも使える。
+
+分位点は窓を昇順に並べた sorted_window[int(q * (window - 1))] とする。
+"""
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Sequence, Tuple, TypeVar
+
+from binary_indexed_tree import BinaryIndexedTreeMultiset
+from treap import Monoid, SortedTreap
+
+T = TypeVar('T')
+
+
+# 窓の並びだけを使うので、畳み込みも作用もしない Monoid
+_order_monoid = Monoid(
+    fx=lambda x1, x2: x1,
+    fa=lambda x, m: x,
+    fm=lambda m1, m2: m1,
+    fp=lambda m, length: m,
+    ex=lambda: None,
+    em=lambda: None,
+    )
+
+
+def _check(window: int, quantiles: Sequence[float]) -> None:
+    if window <= 0:
+        raise ValueError(window)
+    if any(not (0 <= q <= 1) for q in quantiles):
+        raise ValueError(quantiles)
+
+
+def _sweep(ranks: Iterable[int], size: int, window: int, quantiles: Sequence[float]) -> Iterator[Tuple[int, ...]]:
+    _check(window, quantiles)
+    ks = [int(q * (window - 1)) for q in quantiles]
+    ms = BinaryIndexedTreeMultiset(size)
+    q: Deque[int] = deque()
+    for r in ranks:
+        ms.add(r)
+        q.append(r)
+        if len(q) > window:
+            ms.remove(q.popleft())
+        if len(q) == window:
+            yield tuple(ms.kth(k) for k in ks)
+
+
+def windowed_quantiles(values: Iterable[T], window: int,
+                       quantiles: Sequence[float] = (0.5,)) -> Iterator[Tuple[T, ...]]:
+    """窓が埋まった位置から、各分位点の値のタプルを順に返す。
+
+    values は 1 つずつ読むだけなので、終わりのないジェネレータでもよい。"""
+    _check(window, quantiles)
+    ks = [int(q * (window - 1)) for q in quantiles]
+    ms: SortedTreap[T, None] = SortedTreap(_order_monoid)
+    q: Deque[T] = deque()
+    for v in values:
+        ms.add(v)
+        q.append(v)
+        if len(q) > window:
+            ms.remove(q.popleft())
+        if len(q) == window:
+            yield tuple(ms.kth(k) for k in ks)
+
+
+def offline_windowed_quantiles(values: Sequence[T], window: int,
+                               quantiles: Sequence[float] = (0.5,)) -> Iterator[Tuple[T, ...]]:
+    """windowed_quantiles と同じものを座標圧縮した BinaryIndexedTreeMultiset で求める。
+
+    圧縮のために values を最初に全部読むので、終わりのある列に限る。"""
+    values = list(values)
+    keys: List[T] = sorted(set(values))
+    ranks = {v: i for i, v in enumerate(keys)}
+    for rs in _sweep((ranks[v] for v in values), len(keys), window, quantiles):
+        yield tuple(keys[r] for r in rs)
+
+
+def bucketed_windowed_quantiles(values: Iterable[float], window: int, lo: float, hi: float,
+                                resolution: float,
+                                quantiles: Sequence[float] = (0.5,)) -> Iterator[Tuple[float, ...]]:
+    """[lo, hi) を resolution 刻みに丸めて数える。範囲外の値は端のバケツに入れる。
+    返す値はバケツの下端。"""
+    size = max(int((hi - lo) // resolution), 1)
+    last = size - 1
+
+    def bucket(v: float) -> int:
+        return min(max(int((v - lo) // resolution), 0), last)
+
+    for rs in _sweep(map(bucket, values), size, window, quantiles):
+        yield tuple(lo + r * resolution for r in rs)
+
+
+def main() -> None:
+    from random import Random
+    r = Random(0)
+    latencies = [r.expovariate(1 / 20) for _ in range(20)]
+    for p50, p99 in windowed_quantiles(latencies, 8, (0.5, 0.99)):
+        print(f'{p50=:.2f} {p99=:.2f}')
+    for p50, p99 in bucketed_windowed_quantiles(iter(latencies), 8, 0, 200, 0.5, (0.5, 0.99)):
+        print(f'{p50=:.2f} {p99=:.2f}')
+
+
+if __name__ == '__main__':
+    main()